@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+'''Measure how long `import embypy` takes
+
+Each run imports embypy in a new interpreter (using `-X importtime`), and
+the median time is reported along with the slowest modules.
+
+Exits with status 1 if the median is above `--max-ms`, or if a module
+that should only be imported when used (see `LAZY`) was imported.
+
+Usage: python benchmarks/import_time.py [--runs N] [--max-ms MS]
+'''
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# modules that should not be imported by `import embypy`
+LAZY = (
+    'arrow',
+    'importlib.metadata',
+    'pkg_resources',
+    'requests',
+    'simplejson',
+    'websockets',
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    # {module: (self us, cumulative us)} for one `import embypy`
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import embypy'],
+        env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+        check=True, universal_newlines=True,
+    ).stderr
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        own, total, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        times[name.strip()] = (int(own), int(total))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='number of imports to time (default 10)')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='fail if the median is above this')
+    parser.add_argument('--top', type=int, default=10,
+                        help='number of slowest modules to show')
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    median = statistics.median(run['embypy'][1] for run in runs) / 1000
+
+    print('import embypy: {:.1f} ms (median of {} runs)'.format(
+        median, args.runs
+    ))
+    print('slowest modules (self time, last run):')
+    last = sorted(runs[-1].items(), key=lambda i: i[1][0], reverse=True)
+    for name, (own, _) in last[:args.top]:
+        print('  {:8.1f} ms  {}'.format(own / 1000, name))
+
+    failed = False
+    imported = sorted(set(LAZY).intersection(runs[-1]))
+    if imported:
+        print('imported eagerly: ' + ', '.join(imported))
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print('slower than {} ms'.format(args.max_ms))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,25 +13,29 @@ __author__ = 'Andriy Zasypkin'
 __license__ = 'LGPLv3'
 __copyright__ = 'Copyright 2018, Andriy Zasypkin'
 
-from pkg_resources import require, get_distribution, DistributionNotFound
-import os.path
-
-try:
-    _dist = get_distribution('embypy')
-    # Normalize case for Windows systems
-    dist_loc = os.path.normcase(_dist.location)
-    here = os.path.normcase(__file__)
-    if not here.startswith(os.path.join(dist_loc, 'embypy')):
-        # not installed, but there is another version that *is*
-        raise DistributionNotFound
-except DistributionNotFound:
-    try:
-        __version__ = require("embypy")[0].version
-    except Exception:
-        __version__ = '0.0.0.0'
-else:
-    __version__ = _dist.version
-
 import embypy.utils
 import embypy.objects
 from embypy.emby import Emby
+from embypy.facades import EmbyAsync, EmbySync
+
+
+def _get_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return '0.0.0.0'
+    try:
+        return version('embypy')
+    except PackageNotFoundError:
+        return '0.0.0.0'
+
+
+def __getattr__(name):
+    # finding the installed version is slow, so it is only done when used
+    if name == '__version__':
+        global __version__
+        __version__ = _get_version()
+        return __version__
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
@@ -1,12 +1,26 @@
-from simplejson.scanner import JSONDecodeError
-
 import asyncio
+import datetime
+import json
+import threading
 
 from embypy import objects
-from embypy.utils import Connector
+from embypy.utils import Connector, Snapshot
+from embypy.utils.connector import WebSocket
 from embypy.utils.asyncio import async_func
 
 
+# item type -> name of the cached list it appears in
+_COLLECTIONS = {
+    'MusicAlbum':	'albums',
+    'Audio':		'songs',
+    'Playlist':		'playlists',
+    'MusicArtist':	'artists',
+    'Movie':		'movies',
+    'Series':		'series',
+    'Episode':		'episodes',
+}
+
+
 class Emby(objects.EmbyObject):
     '''Emby connection class, an object of this type should be created
     to communicate with emby
@@ -26,16 +40,70 @@ class Emby(objects.EmbyObject):
     password : str, optional
       password for user to login as
 
+    page_concurrency : int, optional
+      number of pages to request at once when listing items (default 4)
+    page_size : int, optional
+      number of items per page when listing the items of a folder,
+      album, series, ... (default 200)
+    compact : bool, optional
+      keep objects in a memory efficient form (default False)
+    fields : str or list, optional
+      fields to request for listed items (e.g. `Path,Genres`) instead
+      of the default ones, `ids` to only get the basic info (id, name,
+      type, ...) without images and user data
+    pool_limit : int, optional
+      max number of open connections (default 100)
+
+    snapshot : str or embypy.utils.Snapshot, optional
+      file to keep library listings in between runs (see notes)
+    snapshot_max_age : float or dict, optional
+      seconds before a listing in the snapshot is fetched again in full
+      (per collection if a dict, see :class:`embypy.utils.Snapshot`)
+
     Attributes
     ----------
     connector : embypy.utils.connector.Connector
       Object used to make api requests, do not use
+    snapshot : embypy.utils.Snapshot
+      on-disk store of library listings (or None)
+
+    Notes
+    -----
+    When a snapshot is used, the library listings (`songs`, `movies`, ...)
+    are loaded from it, and only items changed since the last sync are
+    requested from emby.
     '''
     def __init__(self, url, **kargs):
         connector = Connector(url, **kargs)
         super().__init__({'ItemId': '', 'Name': ''}, connector)
         self._partial_cache = {}
-        self._cache_lock = asyncio.Condition()
+        self._cache_lock = threading.Lock()
+
+        snapshot = kargs.get('snapshot')
+        if isinstance(snapshot, str):
+            snapshot = Snapshot(snapshot, kargs.get('snapshot_max_age'))
+        self.snapshot = snapshot
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @async_func
+    async def close(self):
+        '''close connections to emby (and the snapshot file)
+
+        |coro|
+
+        Notes
+        -----
+        Connections are kept open between requests, so this should be
+        called once done (or use `async with Emby(...) as emby:`)
+        '''
+        await self.connector.close()
+        if self.snapshot:
+            self.snapshot.close()
 
     @async_func
     async def info(self, obj_id=None):
@@ -53,7 +121,7 @@ class Emby(objects.EmbyObject):
         if obj_id:
             try:
                 return await self.process(obj_id)
-            except JSONDecodeError:
+            except ValueError:
                 raise LookupError(
                     'Error object with that id does not exist',
                     obj_id
@@ -108,7 +176,9 @@ class Emby(objects.EmbyObject):
         return sorted(items, key=lambda x: sort_map.get(x.type, m_size))
 
     @async_func
-    async def latest(self, userId=None, itemTypes='', groupItems=False):
+    async def latest(
+        self, userId=None, itemTypes='', groupItems=False, fields=None
+    ):
         '''returns list of latest items
 
         |coro|
@@ -122,6 +192,8 @@ class Emby(objects.EmbyObject):
           if provided, then the list will only include items
           if that type - gets passed to the emby api
           see https://github.com/MediaBrowser/Emby/wiki/Item-Types
+        fields : str or list, optional
+          fields to request for each item, `ids` for only the basic info
 
         Returns
         -------
@@ -134,11 +206,12 @@ class Emby(objects.EmbyObject):
             userId=userId,
             IncludeItemTypes=itemTypes,
             GroupItems=groupItems,
+            **self._fields_params(None, fields)
         )
         return await self.process(json)
 
     @async_func
-    async def nextUp(self, userId=None):
+    async def nextUp(self, userId=None, fields=None):
         '''returns list of items marked as `next up`
 
         |coro|
@@ -148,6 +221,8 @@ class Emby(objects.EmbyObject):
         userId : str
           if provided, then the list returned is
           the one that that use will see.
+        fields : str or list, optional
+          fields to request for each item, `ids` for only the basic info
 
         Returns
         -------
@@ -159,10 +234,157 @@ class Emby(objects.EmbyObject):
             '/Shows/NextUp',
             pass_uid=True,
             remote=False,
-            userId=userId
+            userId=userId,
+            **self._fields_params(None, fields)
         )
         return await self.process(json)
 
+    async def _user_ids(self, user_ids=None):
+        # ids of the given users (or objects), all users if None
+        if user_ids is None:
+            user_ids = await self.users
+        return list(dict.fromkeys(getattr(u, 'id', u) for u in user_ids))
+
+    async def _gather(self, keys, func, concurrency=None):
+        # run `func(key)` for each key, a few at a time
+        sem = asyncio.Semaphore(concurrency or self.connector.page_concurrency)
+
+        async def run(key):
+            async with sem:
+                return await func(key)
+
+        results = await asyncio.gather(*(run(key) for key in keys))
+        return dict(zip(keys, results))
+
+    @async_func
+    async def latest_many(
+        self, user_ids=None, itemTypes='', groupItems=False, fields=None,
+        concurrency=None
+    ):
+        '''latest items of many users at once
+
+        |coro|
+
+        Parameters
+        ----------
+        user_ids : list, optional
+          ids (or user objects) of the users, all users by default
+        itemTypes : str, optional
+          same as for `latest`
+        groupItems : bool, optional
+          same as for `latest`
+        fields : str or list, optional
+          same as for `latest`
+        concurrency : int, optional
+          max number of users requested at the same time
+          (default: the connector's `page_concurrency`)
+
+        Returns
+        -------
+        dict
+          user id to the list of latest items for that user
+        '''
+        return await self._gather(
+            await self._user_ids(user_ids),
+            lambda user_id: self.latest(
+                user_id, itemTypes, groupItems, fields=fields
+            ),
+            concurrency,
+        )
+
+    @async_func
+    async def next_up_many(self, user_ids=None, fields=None, concurrency=None):
+        '''next up items of many users at once
+
+        |coro|
+
+        Parameters
+        ----------
+        user_ids : list, optional
+          ids (or user objects) of the users, all users by default
+        fields : str or list, optional
+          same as for `nextUp`
+        concurrency : int, optional
+          max number of users requested at the same time
+          (default: the connector's `page_concurrency`)
+
+        Returns
+        -------
+        dict
+          user id to the list of next up items for that user
+        '''
+        return await self._gather(
+            await self._user_ids(user_ids),
+            lambda user_id: self.nextUp(user_id, fields=fields),
+            concurrency,
+        )
+
+    @async_func
+    async def user_data_many(
+        self, items, user_ids=None, chunk_size=100, concurrency=None
+    ):
+        '''user data (played, favorite, ...) of items for many users
+
+        |coro|
+
+        Parameters
+        ----------
+        items : list
+          ids (or emby objects) of the items
+        user_ids : list, optional
+          ids (or user objects) of the users, all users by default
+        chunk_size : int, optional
+          max number of items to look up per request
+        concurrency : int, optional
+          max number of requests sent at the same time
+          (default: the connector's `page_concurrency`)
+
+        Notes
+        -----
+        The user data is returned as is, the objects in `items` are not
+        changed (their `UserData` stays the one of the connector's user).
+
+        Returns
+        -------
+        dict
+          user id to a dict of item id to the `UserData` dict of the item
+          (items the user can not see are left out)
+        '''
+        ids = list(dict.fromkeys(getattr(i, 'id', i) for i in items))
+        chunks = [
+            ','.join(ids[i:i + chunk_size])
+            for i in range(0, len(ids), chunk_size)
+        ]
+
+        async def get_user_data(user_id, chunk):
+            resp = await self.connector.getJson(
+                '/Users/{UserId}/Items',
+                remote		= False,
+                userId		= user_id,
+                Ids		= chunk,
+                Fields		= '',
+                EnableImages	= 'false',
+                EnableUserData	= 'true',
+            )
+            return {
+                item['Id']: item.get('UserData', {})
+                for item in resp.get('Items', [])
+            }
+
+        results = await self._gather(
+            [
+                (user_id, chunk)
+                for user_id in await self._user_ids(user_ids)
+                for chunk in chunks
+            ],
+            lambda key: get_user_data(*key),
+            concurrency,
+        )
+        user_data = {}
+        for (user_id, _), data in results.items():
+            user_data.setdefault(user_id, {}).update(data)
+        return user_data
+
     @async_func
     async def update(self):
         '''
@@ -193,6 +415,107 @@ class Emby(objects.EmbyObject):
             except Exception:
                 pass
 
+    @async_func
+    async def listen(self):
+        '''keep cached lists and objects up to date using the websocket
+
+        |coro|
+
+        Items that emby reports as added or updated are requested again
+        (all together), removed items are dropped from the cached lists.
+        The websocket reconnects if the connection is lost, and calling
+        this again reuses it.
+
+        Returns
+        -------
+        asyncio.Task
+          task that handles the websocket messages
+
+        See Also
+        --------
+          apply_library_changes :
+        '''
+        ws = self.connector.ws
+        if ws is None:
+            ws = WebSocket(self.connector, ssl_str=self.connector.ssl)
+            self.connector.ws = ws
+        if self._on_ws_message not in ws.on_message:
+            ws.on_message.append(self._on_ws_message)
+        return await ws.connect()
+
+    async def _on_ws_message(self, ws, message):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            return
+        data = message.get('Data') or {}
+        if message.get('MessageType') == 'LibraryChanged':
+            await self.apply_library_changes(
+                added	= data.get('ItemsAdded', []),
+                updated	= data.get('ItemsUpdated', []),
+                removed	= data.get('ItemsRemoved', []),
+            )
+        elif message.get('MessageType') == 'UserDataChanged':
+            if data.get('UserId') == self.connector.userid:
+                self._apply_user_data(data.get('UserDataList', []))
+
+    def _apply_user_data(self, user_data):
+        for data in user_data:
+            obj = self.known_objects.get(data.get('ItemId'))
+            if obj:
+                obj._merge({'UserData': {
+                    **obj.object_dict.get('UserData', {}),
+                    **data,
+                }})
+
+    @async_func
+    async def apply_library_changes(self, added=(), updated=(), removed=()):
+        '''update cached lists and objects after the library changed
+
+        |coro|
+
+        Parameters
+        ----------
+        added : list
+          ids of items that were added to emby
+        updated : list
+          ids of items that were changed
+        removed : list
+          ids of items that were removed from emby
+        '''
+        removed = set(removed)
+        if removed:
+            for itemId in removed:
+                self.known_objects.pop(itemId)
+            for key, items in self.extras.items():
+                if type(items) == list:
+                    self.extras[key] = [
+                        i for i in items
+                        if getattr(i, 'id', None) not in removed
+                    ]
+            if self.snapshot:
+                self.snapshot.remove(removed)
+
+        changed = [i for i in dict.fromkeys([*added, *updated])
+                   if i not in removed]
+        if not changed:
+            return
+
+        fields = self._list_params(
+            '', 'Genres,Tags,Artists,ProviderIds'
+        )['Fields']
+        items = await self.process_ids(changed, refresh=True, fields=fields)
+        known = {}
+        for obj in items:
+            key = _COLLECTIONS.get(getattr(obj, 'type', None))
+            if key not in self.extras:
+                continue
+            if key not in known:
+                known[key] = {i.id for i in self.extras[key]}
+            if obj.id not in known[key]:
+                self.extras[key].append(obj)
+                known[key].add(obj.id)
+
     @async_func
     async def create_playlist(self, name, *songs):
         '''create a new playlist
@@ -220,12 +543,112 @@ class Emby(objects.EmbyObject):
             remote=False
         )
 
+    def image_urls(self, items, image_type='Primary'):
+        '''urls of an image of many items at once
+
+        Parameters
+        ----------
+        items : list
+          emby objects (or ids)
+        image_type : str, optional
+          kind of image, e.g. `Primary` (default), `Backdrop`, or `Thumb`
+
+        Returns
+        -------
+        list
+          urls in the same order as `items`
+
+        See Also
+        --------
+          embypy.objects.EmbyObject.primary_image_url :
+        '''
+        return self.connector.get_urls(
+            '/Items/{Id}/Images/' + image_type,
+            [getattr(item, 'id', item) for item in items],
+            attach_api_key=False,
+        )
+
+    def stream_urls(self, items):
+        '''stream urls of many songs/videos at once
+
+        Parameters
+        ----------
+        items : list
+          emby objects
+
+        Returns
+        -------
+        list
+          urls in the same order as `items`
+          (None for items that can not be streamed)
+
+        See Also
+        --------
+          embypy.objects.Audio.stream_url :
+          embypy.objects.Video.stream_url :
+        '''
+        items = list(items)
+        groups = {}
+        for index, item in enumerate(items):
+            groups.setdefault(type(item), []).append(index)
+
+        urls = [None] * len(items)
+        for cls, indices in groups.items():
+            path = getattr(cls, 'stream_path', None)
+            if not path:
+                continue
+            group_urls = self.connector.get_urls(
+                path, [items[i].id for i in indices], **cls.stream_query
+            )
+            for index, url in zip(indices, group_urls):
+                urls[index] = url
+        return urls
+
+    async def _get_snapshot_list(self, collection, path, *args, **params):
+        # stored items are sorted by SortName when loaded
+        params['Fields'] = ','.join(
+            filter(None, [params.get('Fields'), 'SortName'])
+        )
+        synced = datetime.datetime.now(datetime.timezone.utc)
+        if self.snapshot.is_stale(collection, synced):
+            items = await self._get_pages(path, *args, **params)
+            self.snapshot.save(collection, items, synced, full=True)
+            return items
+
+        # a few minutes of overlap, in case the clocks are not in sync
+        _, since = self.snapshot.sync_times(collection)
+        since = since - datetime.timedelta(minutes=5)
+        items = await self._get_pages(
+            path, *args,
+            MinDateLastSaved=since.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            **params
+        )
+        self.snapshot.save(collection, items, synced)
+        return self.snapshot.load(collection)
+
+    def _list_params(self, types, extra_fields='', fields=None):
+        default = 'Path,ParentId,Overview,PremiereDate,DateCreated'
+        if extra_fields:
+            default = f'{default},{extra_fields}'
+        return {
+            'remote'		: False,
+            'format'		: 'json',
+            'recursive'		: 'true',
+            'includeItemTypes'	: types,
+            'sortBy'		: 'SortName',
+            'sortOrder'		: 'Ascending',
+            **self._fields_params(default, fields),
+        }
+
     async def _get_list(
         self,
         types,
         path='/Users/{UserId}/Items',
         extra_fields='',
         limit=200,
+        concurrency=None,
+        collection=None,
+        fields=None,
         **params
     ):
         # Note: assumes no duplicates returned by jellyfin/emby
@@ -234,65 +657,158 @@ class Emby(objects.EmbyObject):
         # bigger requests = more chances of failure
         # 200 items/request seems to be a nice sweetspot where I'm
         # not getting failures
-        total = -1
-        last = -1
-        fields = 'Path,ParentId,Overview,PremiereDate,DateCreated'
-        if extra_fields:
-            fields = f'{fields},{extra_fields}'
-        hash = (types, path, extra_fields)
-        async with self._cache_lock:
-            count, event, items = self._partial_cache.get(hash, (0, None, []))
-
-            if event is None:
-                event = asyncio.Event()
-            self._partial_cache[hash] = (count + 1, event, items)
-
-        if count != 0:
-            waiting = True
-            while waiting:
-                await event.wait()
-                async with self._cache_lock:
-                    if event.is_set():
-                        event.clear()
-                        waiting = False
-
-        while len(items) != last and (len(items) < total or total == -1):
-            try:
-                resp = await self.connector.getJson(
-                    path,
-                    remote		= False,
-                    format		= 'json',
-                    recursive		= 'true',
-                    includeItemTypes	= types,
-                    fields		= fields,
-                    sortBy		= 'SortName',
-                    sortOrder		= 'Ascending',
-                    startIndex		= len(items),
-                    limit		= limit,
-                    **params
+
+        # one fetch per list and event loop (sync calls use their own loop)
+        hash = (
+            asyncio.get_running_loop(), types, path, extra_fields, fields
+        )
+
+        async def fetch():
+            list_params = {
+                **self._list_params(types, extra_fields, fields),
+                **params
+            }
+            # snapshots always have the default fields
+            if collection and self.snapshot and fields is None \
+               and self.connector.fields is None:
+                return await self._get_snapshot_list(
+                    collection, path, limit, concurrency, **list_params
                 )
-                total = int(resp.get('TotalRecordCount', -1))
-                last = len(items)
-                items.extend(resp['Items'])
-                async with self._cache_lock:
-                    count, event, _ = self._partial_cache[hash]
-                    self._partial_cache[hash] = (count, event, items)
-            except Exception:
-                async with self._cache_lock:
-                    self._partial_cache[hash] = (count - 1, event, items)
-                event.set()
-                raise
-        # do all the item fetching after we get the full list of item ids
+            return await self._get_pages(
+                path, limit, concurrency, **list_params
+            )
+
+        with self._cache_lock:
+            count, task = self._partial_cache.get(hash, (0, None))
+            if task is None:
+                task = asyncio.ensure_future(fetch())
+                # the error is raised in every caller, don't log it again
+                task.add_done_callback(
+                    lambda task: task.cancelled() or task.exception()
+                )
+            self._partial_cache[hash] = (count + 1, task)
+
         try:
+            # only one request per list is sent out at a time,
+            # everyone else just waits for the results
+            items = await asyncio.shield(task)
+
+            # do all the item fetching after we get the full list of item ids
             return await self.process(items)
         finally:
-            async with self._cache_lock:
-                count, event, _ = self._partial_cache[hash]
-                event.set()
+            with self._cache_lock:
+                count, task = self._partial_cache[hash]
                 if count <= 1:
                     del self._partial_cache[hash]
                 else:
-                    self._partial_cache[hash] = (count - 1, event, items)
+                    self._partial_cache[hash] = (count - 1, task)
+
+    @async_func
+    async def iter_items(
+        self,
+        types,
+        path='/Users/{UserId}/Items',
+        extra_fields='',
+        limit=200,
+        concurrency=None,
+        fields=None,
+        **filters
+    ):
+        '''iterate over items of the given types, one page at a time
+
+        |coro|
+
+        Parameters
+        ----------
+        types : str
+          comma separated item types to include (e.g. `Movie,Episode`)
+        extra_fields : str, optional
+          additional fields to request for each item
+        limit : int, optional
+          number of items to request per page
+        concurrency : int, optional
+          number of pages to request ahead of time
+        fields : str or list, optional
+          fields to request for each item instead of the default ones
+          (and `extra_fields`), `ids` for only the basic info
+        filters : karg dict
+          additional parameters passed to emby (e.g. `ParentId`)
+
+        Notes
+        -----
+        Unlike the list properties (`movies`, `songs`, ...) nothing is
+        cached, and only the pages currently in flight are kept in memory.
+        Without a running event loop a regular generator is returned.
+
+        Yields
+        ------
+        EmbyObject
+          subclass of :class:`embypy.objects.EmbyObject`
+        '''
+        async for item in self._iter_objects(
+            path,
+            limit		= limit,
+            concurrency	= concurrency,
+            **{**self._list_params(types, extra_fields, fields), **filters}
+        ):
+            yield item
+
+    @async_func
+    async def iter_songs(self, limit=300, fields=None, **filters):
+        '''iterate over all songs, see `iter_items`
+
+        |coro|
+
+        Yields
+        ------
+        :class:`embypy.objects.Audio`
+        '''
+        async for item in self.iter_items(
+            'Audio',
+            extra_fields='Genres,Tags,Artists',
+            limit=limit,
+            fields=fields,
+            **filters
+        ):
+            yield item
+
+    @async_func
+    async def iter_movies(self, limit=100, fields=None, **filters):
+        '''iterate over all movies, see `iter_items`
+
+        |coro|
+
+        Yields
+        ------
+        :class:`embypy.objects.Movie`
+        '''
+        async for item in self.iter_items(
+            'Movie',
+            extra_fields='Genres,Tags,ProviderIds',
+            limit=limit,
+            fields=fields,
+            **filters
+        ):
+            yield item
+
+    @async_func
+    async def iter_episodes(self, limit=500, fields=None, **filters):
+        '''iterate over all episodes, see `iter_items`
+
+        |coro|
+
+        Yields
+        ------
+        :class:`embypy.objects.Episode`
+        '''
+        async for item in self.iter_items(
+            'Episode',
+            extra_fields='Genres,Tags',
+            limit=limit,
+            fields=fields,
+            **filters
+        ):
+            yield item
 
     @property
     @async_func
@@ -316,6 +832,7 @@ class Emby(objects.EmbyObject):
         items = await self._get_list(
             'MusicAlbum',
             extra_fields='Genres,Tags,Artists',
+            collection='albums',
         )
         self.extras['albums'] = items
         return items
@@ -343,6 +860,7 @@ class Emby(objects.EmbyObject):
             'Audio',
             extra_fields='Genres,Tags,Artists',
             limit=300,
+            collection='songs',
         )
         self.extras['songs'] = items
         return items
@@ -366,7 +884,7 @@ class Emby(objects.EmbyObject):
     @property
     @async_func
     async def playlists_force(self):
-        items = await self._get_list('Playlist')
+        items = await self._get_list('Playlist', collection='playlists')
         self.extras['playlists'] = items
         return items
 
@@ -392,6 +910,7 @@ class Emby(objects.EmbyObject):
         items = await self._get_list(
             'MusicArtist',
             extra_fields='Genres,Tags',
+            collection='artists',
         )
         self.extras['artists'] = items
         return items
@@ -419,6 +938,7 @@ class Emby(objects.EmbyObject):
             'Movie',
             extra_fields='Genres,Tags,ProviderIds',
             limit=100,
+            collection='movies',
         )
         self.extras['movies'] = items
         return items
@@ -442,7 +962,11 @@ class Emby(objects.EmbyObject):
     @property
     @async_func
     async def series_force(self):
-        items = await self._get_list('Series', extra_fields='Genres,Tags')
+        items = await self._get_list(
+            'Series',
+            extra_fields='Genres,Tags',
+            collection='series',
+        )
         self.extras['series'] = items
         return items
 
@@ -469,6 +993,7 @@ class Emby(objects.EmbyObject):
             'Episode',
             extra_fields='Genres,Tags',
             limit=500,
+            collection='episodes',
         )
         self.extras['episodes'] = items
         return items
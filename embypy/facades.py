@@ -0,0 +1,194 @@
+import functools
+import inspect
+
+from embypy.emby import Emby
+from embypy.objects.object import EmbyObject
+from embypy.utils.asyncio import (
+    _get_loop, _run_sync, async_class, iter_over_async, unwrap_async
+)
+
+
+class EmbyAsync(async_class(Emby)):
+    '''Emby connection that is only used from async code
+
+    Same parameters as :class:`embypy.Emby`
+
+    Notes
+    -----
+    Methods and properties of this object (and of the objects it creates)
+    always return coroutines (or async generators), without checking
+    for a running event loop on every call.
+    '''
+    def __init__(self, url, **kargs):
+        super().__init__(url, **kargs)
+        self.connector.only_async = True
+
+
+class SyncObject:
+    '''Base class of the sync wrappers of emby objects
+
+    Attributes that are not wrapped (e.g. `connector` or `object_dict`)
+    are taken from the wrapped object.
+
+    See Also
+    --------
+      sync_class :
+    '''
+    __slots__ = ('_obj',)
+
+    def __init__(self, obj):
+        object.__setattr__(self, '_obj', obj)
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._obj, name, _unwrap(value))
+
+    def __eq__(self, other):
+        return self._obj == _unwrap(other)
+
+    def __str__(self):
+        return str(self._obj)
+
+    def __repr__(self):
+        return repr(self._obj)
+
+    @property
+    def wrapped(self):
+        '''the emby object that is wrapped'''
+        return self._obj
+
+
+def _wrap(value):
+    if isinstance(value, EmbyObject):
+        return sync_class(type(value))(value)
+    if isinstance(value, list):
+        return [_wrap(item) for item in value]
+    return value
+
+
+def _unwrap(value):
+    if isinstance(value, SyncObject):
+        return value._obj
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+def _sync_method(func):
+    if inspect.isasyncgenfunction(func):
+        def method(self, *args, **kargs):
+            ait = func(self._obj, *_unwrap(args), **{
+                key: _unwrap(value) for key, value in kargs.items()
+            })
+            return map(_wrap, iter_over_async(ait, _get_loop()))
+    elif inspect.iscoroutinefunction(func):
+        def method(self, *args, **kargs):
+            return _wrap(_run_sync(func(self._obj, *_unwrap(args), **{
+                key: _unwrap(value) for key, value in kargs.items()
+            })))
+    else:
+        def method(self, *args, **kargs):
+            return _wrap(func(self._obj, *_unwrap(args), **{
+                key: _unwrap(value) for key, value in kargs.items()
+            }))
+    return functools.update_wrapper(method, func)
+
+
+def _sync_property(prop):
+    fget = unwrap_async(prop.fget)
+    if fget is not None and inspect.iscoroutinefunction(fget):
+        def getter(self):
+            return _wrap(_run_sync(fget(self._obj)))
+    else:
+        fget = prop.fget
+
+        def getter(self):
+            return _wrap(fget(self._obj))
+
+    if prop.fset is None:
+        return property(getter, None, None, prop.__doc__)
+    fset = prop.fset
+
+    def setter(self, value):
+        fset(self._obj, _unwrap(value))
+
+    return property(getter, setter, None, prop.__doc__)
+
+
+_sync_classes = {}
+
+
+def sync_class(cls):
+    '''get the sync wrapper class of an emby object class
+
+    Parameters
+    ----------
+    cls : type
+      subclass of :class:`embypy.objects.EmbyObject`
+
+    Returns
+    -------
+    type
+      subclass of :class:`SyncObject` with the public methods and
+      properties of `cls`, which block until the result is ready
+      (instead of returning coroutines)
+
+    Notes
+    -----
+    The wrappers are created once per class, so calls do not check for
+    a running event loop. Objects returned by the wrapped methods are
+    wrapped as well, and wrapped objects passed as arguments are
+    unwrapped.
+    '''
+    new_cls = _sync_classes.get(cls)
+    if new_cls is not None:
+        return new_cls
+
+    attrs = {}
+    for klass in reversed(cls.__mro__):
+        attrs.update(vars(klass))
+
+    namespace = {
+        '__slots__': (),
+        '__module__': cls.__module__,
+        '__doc__': cls.__doc__,
+    }
+    for name, value in attrs.items():
+        if name.startswith('_') or name in vars(SyncObject):
+            continue
+        if isinstance(value, property):
+            namespace[name] = _sync_property(value)
+        elif inspect.isfunction(value):
+            namespace[name] = _sync_method(unwrap_async(value) or value)
+
+    new_cls = type(cls.__name__, (SyncObject,), namespace)
+    _sync_classes[cls] = new_cls
+    return new_cls
+
+
+class EmbySync(sync_class(Emby)):
+    '''Emby connection that is only used from sync code (no event loop)
+
+    Same parameters as :class:`embypy.Emby`
+
+    Notes
+    -----
+    Methods and properties block until the result is ready, and objects
+    are returned as sync wrappers (see :class:`SyncObject`).
+    Requests run on a shared background event loop, so the connection
+    can be used from many threads at once.
+
+    Do not use this from async code, use :class:`EmbyAsync` instead.
+    '''
+    __slots__ = ()
+
+    def __init__(self, url, **kargs):
+        super().__init__(Emby(url, **kargs))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
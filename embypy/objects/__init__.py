@@ -5,4 +5,5 @@ from embypy.objects.videos  import *
 from embypy.objects.misc    import *
 
 from embypy.objects.object  import *
+from embypy.objects.compact import *
 
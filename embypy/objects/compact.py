@@ -0,0 +1,140 @@
+import json
+
+from embypy.objects.object import EmbyObject
+
+# the regular `object_dict` slot holds the decoded dict (once decoded)
+_dict_slot = EmbyObject.__dict__['object_dict']
+
+# json keys of the fields that are kept outside of the encoded dict
+_HOT_KEYS = (
+    ('_id',		'Id'),
+    ('_name',		'Name'),
+    ('_type',		'Type'),
+    ('_parent_id',	'ParentId'),
+    ('_run_time',	'RunTimeTicks'),
+    ('_premiere',	'PremiereDate'),
+)
+_HOT_NAMES = {key for _, key in _HOT_KEYS}
+
+_classes = {}
+
+
+class CompactObject:
+    '''Mixin for memory efficient versions of the emby object classes
+
+    The most used fields (id, name, type, parent_id, duration and
+    premier_date) are kept in slots, and the rest of the json dict is
+    stored as encoded bytes until `object_dict` is used.
+
+    Notes
+    -----
+    Once `object_dict` is used, the object behaves like a regular one.
+    Use `compact` to re-encode the dict if the object will be kept around.
+
+    See Also
+    --------
+      compact_class :
+    '''
+    __slots__ = ()
+    _fields = ('_raw',) + tuple(slot for slot, _ in _HOT_KEYS)
+
+    @property
+    def object_dict(self):
+        '''json dict of the object, decoded on first use'''
+        value = _dict_slot.__get__(self)
+        if value is None:
+            value = self.connector.json_loads(self._raw)
+            for slot, key in _HOT_KEYS:
+                if getattr(self, slot) is not None:
+                    value[key] = getattr(self, slot)
+            _dict_slot.__set__(self, value)
+            self._raw = None
+        return value
+
+    @object_dict.setter
+    def object_dict(self, value):
+        _dict_slot.__set__(self, None)
+        for slot, key in _HOT_KEYS:
+            setattr(self, slot, value.get(key))
+        self._raw = json.dumps(
+            {k: v for k, v in value.items() if k not in _HOT_NAMES},
+            separators=(',', ':'),
+        ).encode()
+
+    def compact(self):
+        '''re-encode the json dict if it was decoded'''
+        value = _dict_slot.__get__(self)
+        if value is not None:
+            self.object_dict = value
+
+    def _merge(self, object_dict):
+        super()._merge(object_dict)
+        self.compact()
+
+    @property
+    def id(self):
+        if self._raw is None:
+            return super().id
+        return self._id or self.object_dict.get('ItemId')
+
+    @property
+    def name(self):
+        if self._raw is None:
+            return super().name
+        return self._name or ''
+
+    @name.setter
+    def name(self, value):
+        self.object_dict['Name'] = value
+
+    @property
+    def type(self):
+        if self._raw is None:
+            return super().type
+        return self._type or super().type
+
+    @property
+    def parent_id(self):
+        if self._raw is None:
+            return super().parent_id
+        return self._parent_id
+
+    @property
+    def duration(self):
+        if self._raw is None:
+            return super().duration
+        return (self._run_time or 0) / (10**7)
+
+    @property
+    def premier_date(self):
+        if self._raw is None:
+            return super().premier_date
+        return self._date('PremiereDate', self._premiere)
+
+    @premier_date.setter
+    def premier_date(self, value):
+        EmbyObject.premier_date.fset(self, value)
+
+
+def compact_class(cls):
+    '''get the compact version of an emby object class
+
+    Parameters
+    ----------
+    cls : type
+      subclass of :class:`embypy.objects.EmbyObject`
+
+    Returns
+    -------
+    type
+      subclass of both `cls` and :class:`CompactObject`
+    '''
+    compact = _classes.get(cls)
+    if compact is None:
+        compact = type(cls.__name__, (CompactObject, cls), {
+            '__slots__': CompactObject._fields,
+            '__module__': cls.__module__,
+            '__doc__': cls.__doc__,
+        })
+        _classes[cls] = compact
+    return compact
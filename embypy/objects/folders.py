@@ -1,6 +1,8 @@
 from embypy.objects.object import EmbyObject
 from embypy.utils.asyncio import async_func
 
+import asyncio
+
 
 # Generic class
 class Folder(EmbyObject):
@@ -13,6 +15,8 @@ class Folder(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -50,14 +54,100 @@ class Folder(EmbyObject):
     @property
     @async_func
     async def items_force(self):
-        items = await self.connector.getJson(
-            '/Users/{UserId}/Items', parentId=self.id, remote=False,
-            SortOrder='Ascending', SortBy='SortName',
-        )
-        items = await self.process(items)
+        path, params = self._items_query()
+        items = await self._get_objects(path, **params)
         self.extras['items'] = items
         return items
 
+    @async_func
+    async def iter_items(self, limit=None, concurrency=None, fields=None):
+        '''iterate over the items in the folder, one page at a time
+
+        |coro|
+
+        Parameters
+        ----------
+        limit : int, optional
+          number of items to request per page
+          (default: the connector's `page_size`)
+        concurrency : int, optional
+          number of pages to request ahead of time
+        fields : str or list, optional
+          fields to request for each item, `ids` for only the basic info
+
+        Notes
+        -----
+        Unlike `items`, nothing is cached, and only the pages currently
+        in flight are kept in memory.
+
+        Yields
+        ------
+        EmbyObject
+          subclass of :class:`embypy.objects.EmbyObject`
+        '''
+        path, params = self._items_query(fields)
+        async for item in self._iter_objects(
+            path, limit, concurrency, **params
+        ):
+            yield item
+
+    async def _expand(self, item_type, name, force=False):
+        # items of `item_type` in this folder and the folders nested in it.
+        # Nested folders are requested level by level (a few at a time),
+        # and each of them only once, even if it is in several places.
+        sem = asyncio.Semaphore(self.connector.page_concurrency)
+
+        async def get_contents(folder):
+            async with sem:
+                if folder is self:
+                    return await (self.items_force if force else self.items)
+                if isinstance(folder, (Playlist, BoxSet)):
+                    return await folder.items
+                found = await getattr(folder, name)
+                if isinstance(found, EmbyObject):
+                    return [found]
+                return found or []
+
+        contents = {}
+        visited = {self.id}
+        level = [self]
+        while level:
+            results = await asyncio.gather(*map(get_contents, level))
+
+            # look up all the ids of this level at once
+            ids = [i for items in results for i in items if type(i) == str]
+            found = dict(zip(ids, await self.process_ids(ids)))
+
+            next_level = []
+            for folder, items in zip(level, results):
+                items = [found.get(i) if type(i) == str else i for i in items]
+                items = [i for i in items if isinstance(i, EmbyObject)]
+                contents[folder.id] = items
+                for i in items:
+                    if i.type != item_type and i.id not in visited \
+                       and isinstance(i, Folder) and hasattr(type(i), name):
+                        visited.add(i.id)
+                        next_level.append(i)
+            level = next_level
+
+        def flatten(folder, parents):
+            for i in contents[folder.id]:
+                if i.type == item_type:
+                    yield i
+                elif i.id in contents and i.id not in parents:
+                    yield from flatten(i, parents | {i.id})
+
+        return list(flatten(self, {self.id}))
+
+    def _items_query(self, fields=None):
+        return '/Users/{UserId}/Items', {
+            'parentId'		: self.id,
+            'remote'		: False,
+            'SortOrder'		: 'Ascending',
+            'SortBy'		: 'SortName',
+            **self._fields_params(None, fields),
+        }
+
 
 # Folders
 class Playlist(Folder):
@@ -70,6 +160,8 @@ class Playlist(Folder):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -87,39 +179,20 @@ class Playlist(Folder):
         list
           of type :class:`embypy.objects.Audio`
         '''
-        items = []
-        for i in await self.items:
-            if type(i) == str:
-                items.append(await self.process(i))
-            elif i.type == 'Audio':
-                items.append(i)
-            elif hasattr(i, 'songs'):
-                items.extend(await i.songs)
-        return items
+        return await self._expand('Audio', 'songs')
 
     @property
     @async_func
     async def songs_force(self):
-        items = []
-        for i in await self.items_force:
-            if type(i) == str:
-                items.append(await self.process(i))
-            elif i.type == 'Audio':
-                items.append(i)
-            elif hasattr(i, 'songs'):
-                items.extend(await i.songs)
-        return items
+        return await self._expand('Audio', 'songs', force=True)
 
-    @property
-    @async_func
-    async def items_force(self):
-        items = await self.connector.getJson(
-            'Playlists/{Id}/Items'.format(Id=self.id),
-            remote=False, SortOrder='Ascending', SortBy='SortName',
-        )
-        items = await self.process(items)
-        self.extras['items'] = items
-        return items
+    def _items_query(self, fields=None):
+        return 'Playlists/{Id}/Items'.format(Id=self.id), {
+            'remote'		: False,
+            'SortOrder'		: 'Ascending',
+            'SortBy'		: 'SortName',
+            **self._fields_params(None, fields),
+        }
 
     @async_func
     async def add_items(self, *items):
@@ -185,6 +258,8 @@ class BoxSet(Folder):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -202,28 +277,12 @@ class BoxSet(Folder):
         list
           of type :class:`embypy.objects.Movie`
         '''
-        items = []
-        for i in await self.items:
-            if type(i) == str:
-                items.append(await self.process(i))
-            elif i.type == 'Movie':
-                items.append(i)
-            elif hasattr(i, 'movies'):
-                items.extend(await i.movies)
-        return items
+        return await self._expand('Movie', 'movies')
 
     @property
     @async_func
     async def movies_force(self):
-        items = []
-        for i in await self.items_force:
-            if type(i) == str:
-                items.append(await self.process(i))
-            elif i.type == 'Movie':
-                items.append(i)
-            elif hasattr(i, 'movies'):
-                items.extend(await i.movies)
-        return items
+        return await self._expand('Movie', 'movies', force=True)
 
     @property
     @async_func
@@ -244,15 +303,7 @@ class BoxSet(Folder):
         list
           of type :class:`embypy.objects.Series`
         '''
-        items = []
-        for i in await self.items:
-            if type(i) == str:
-                items.append(await self.process(i))
-            elif i.type == 'Series':
-                items.append(i)
-            elif hasattr(i, 'series'):
-                items.extend(await i.series)
-        return items
+        return await self._expand('Series', 'series')
 
     @property
     @async_func
@@ -262,15 +313,7 @@ class BoxSet(Folder):
     @property
     @async_func
     async def series_force(self):
-        items = []
-        for i in await self.items_force:
-            if type(i) == str:
-                items.append(await self.process(i))
-            elif i.type == 'Series':
-                items.append(i)
-            elif hasattr(i, 'series'):
-                items.extend(await i.series)
-        return items
+        return await self._expand('Series', 'series', force=True)
 
 
 class MusicAlbum(Folder):
@@ -283,6 +326,8 @@ class MusicAlbum(Folder):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -344,23 +389,45 @@ class MusicAlbum(Folder):
     @property
     @async_func
     async def songs_force(self):
-        items = await self.connector.getJson(
-            '/Users/{UserId}/Items',
-            remote            = False,
-            format            = 'json',
-            SortOrder         = 'Ascending',
-            SortBy            = 'SortName',
-            AlbumIds          = self.id,
-            Recursive         = 'true',
-            IncludeItemTypes  = 'Audio',
-            Fields            = 'Path,ParentId,Overview'
-        )
-        items = await self.process(items)
+        path, params = self._songs_query()
+        items = await self._get_objects(path, **params)
         self.extras['songs'] = items
         return items
 
+    @async_func
+    async def iter_songs(self, limit=None, concurrency=None, fields=None):
+        '''iterate over the songs in the album, one page at a time
+
+        |coro|
+
+        Same parameters as `Folder.iter_items`
+
+        Yields
+        ------
+        :class:`embypy.objects.Audio`
+        '''
+        path, params = self._songs_query(fields)
+        async for item in self._iter_objects(
+            path, limit, concurrency, **params
+        ):
+            yield item
+
+    def _songs_query(self, fields=None):
+        return '/Users/{UserId}/Items', {
+            'remote'		: False,
+            'format'		: 'json',
+            'SortOrder'		: 'Ascending',
+            'SortBy'		: 'SortName',
+            'AlbumIds'		: self.id,
+            'Recursive'		: 'true',
+            'IncludeItemTypes'	: 'Audio',
+            **self._fields_params('Path,ParentId,Overview', fields),
+        }
+
 
 class MusicArtist(Folder):
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -387,21 +454,41 @@ class MusicArtist(Folder):
     @property
     @async_func
     async def albums_force(self):
-        items = await self.connector.getJson(
-            '/Users/{UserId}/Items',
-            remote            = False,
-            format            = 'json',
-            SortOrder         = 'Ascending',
-            SortBy            = 'SortName',
-            ArtistIds         = self.id,
-            Recursive         = 'true',
-            IncludeItemTypes  = 'MusicAlbum',
-            Fields            = 'Path,ParentId,Overview'
-        )
-        items = await self.process(items)
+        path, params = self._albums_query()
+        items = await self._get_objects(path, **params)
         self.extras['albums'] = items
         return items
 
+    @async_func
+    async def iter_albums(self, limit=None, concurrency=None, fields=None):
+        '''iterate over the albums that include the artist, one page at a time
+
+        |coro|
+
+        Same parameters as `Folder.iter_items`
+
+        Yields
+        ------
+        :class:`embypy.objects.MusicAlbum`
+        '''
+        path, params = self._albums_query(fields)
+        async for item in self._iter_objects(
+            path, limit, concurrency, **params
+        ):
+            yield item
+
+    def _albums_query(self, fields=None):
+        return '/Users/{UserId}/Items', {
+            'remote'		: False,
+            'format'		: 'json',
+            'SortOrder'		: 'Ascending',
+            'SortBy'		: 'SortName',
+            'ArtistIds'		: self.id,
+            'Recursive'		: 'true',
+            'IncludeItemTypes'	: 'MusicAlbum',
+            **self._fields_params('Path,ParentId,Overview', fields),
+        }
+
     @property
     @async_func
     async def songs(self):
@@ -421,21 +508,41 @@ class MusicArtist(Folder):
     @property
     @async_func
     async def songs_force(self):
-        items = await self.connector.getJson(
-            '/Users/{UserId}/Items',
-            remote            = False,
-            format            = 'json',
-            SortOrder         = 'Ascending',
-            SortBy            = 'SortName',
-            AlbumIds          = self.id,
-            Recursive         = 'true',
-            IncludeItemTypes  = 'Audio',
-            Fields            = 'Path,ParentId,Overview'
-        )
-        items = await self.process(items)
+        path, params = self._songs_query()
+        items = await self._get_objects(path, **params)
         self.extras['songs'] = items
         return items
 
+    @async_func
+    async def iter_songs(self, limit=None, concurrency=None, fields=None):
+        '''iterate over the songs that include the artist, one page at a time
+
+        |coro|
+
+        Same parameters as `Folder.iter_items`
+
+        Yields
+        ------
+        :class:`embypy.objects.Audio`
+        '''
+        path, params = self._songs_query(fields)
+        async for item in self._iter_objects(
+            path, limit, concurrency, **params
+        ):
+            yield item
+
+    def _songs_query(self, fields=None):
+        return '/Users/{UserId}/Items', {
+            'remote'		: False,
+            'format'		: 'json',
+            'SortOrder'		: 'Ascending',
+            'SortBy'		: 'SortName',
+            'ArtistIds'		: self.id,
+            'Recursive'		: 'true',
+            'IncludeItemTypes'	: 'Audio',
+            **self._fields_params('Path,ParentId,Overview', fields),
+        }
+
 
 class Season(Folder):
     '''Class representing emby season objects for TV shows
@@ -447,6 +554,8 @@ class Season(Folder):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -513,23 +622,41 @@ class Season(Folder):
     @property
     @async_func
     async def episodes_force(self):
-        items = await self.connector.getJson(
-            '/Shows/{}/Episodes'.format(self.series_id),
-            remote            = False,
-            format            = 'json',
-            Season            = self.index_number,
-            pass_uid          = True,
-            SortOrder         = 'Ascending',
-            Recursive         = 'true',
-            IncludeItemTypes  = 'Episode',
-            Fields            = 'Path,ParentId,Overview'
-        )
-        items = await self.process(items)
-        #sortkey = lambda x: (x.season_number, x.index_number)
-        #items   = sorted(items, key=sortkey)
+        path, params = self._episodes_query()
+        items = await self._get_objects(path, **params)
         self.extras['episodes'] = items
         return items
 
+    @async_func
+    async def iter_episodes(self, limit=None, concurrency=None, fields=None):
+        '''iterate over the episodes in this season, one page at a time
+
+        |coro|
+
+        Same parameters as `Folder.iter_items`
+
+        Yields
+        ------
+        :class:`embypy.objects.Episode`
+        '''
+        path, params = self._episodes_query(fields)
+        async for item in self._iter_objects(
+            path, limit, concurrency, **params
+        ):
+            yield item
+
+    def _episodes_query(self, fields=None):
+        return '/Shows/{}/Episodes'.format(self.series_id), {
+            'remote'		: False,
+            'format'		: 'json',
+            'Season'		: self.index_number,
+            'pass_uid'		: True,
+            'SortOrder'		: 'Ascending',
+            'Recursive'		: 'true',
+            'IncludeItemTypes'	: 'Episode',
+            **self._fields_params('Path,ParentId,Overview', fields),
+        }
+
 
 class Series(Folder):
     '''Class representing emby TV show/series objects
@@ -541,6 +668,8 @@ class Series(Folder):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -583,20 +712,40 @@ class Series(Folder):
     @property
     @async_func
     async def seasons_force(self):
-        items = await self.connector.getJson(
-            '/Shows/{}/Seasons'.format(self.id),
-            remote            = False,
-            format            = 'json',
-            SortOrder         = 'Ascending',
-            SortBy            = 'SortName',
-            Recursive         = 'true',
-            pass_uid          = True,
-            Fields            = 'Path,ParentId,Overview'
-        )
-        items = await self.process(items)
+        path, params = self._seasons_query()
+        items = await self._get_objects(path, **params)
         self.extras['seasons'] = items
         return items
 
+    @async_func
+    async def iter_seasons(self, limit=None, concurrency=None, fields=None):
+        '''iterate over the seasons of the show, one page at a time
+
+        |coro|
+
+        Same parameters as `Folder.iter_items`
+
+        Yields
+        ------
+        :class:`embypy.objects.Season`
+        '''
+        path, params = self._seasons_query(fields)
+        async for item in self._iter_objects(
+            path, limit, concurrency, **params
+        ):
+            yield item
+
+    def _seasons_query(self, fields=None):
+        return '/Shows/{}/Seasons'.format(self.id), {
+            'remote'		: False,
+            'format'		: 'json',
+            'SortOrder'		: 'Ascending',
+            'SortBy'		: 'SortName',
+            'Recursive'		: 'true',
+            'pass_uid'		: True,
+            **self._fields_params('Path,ParentId,Overview', fields),
+        }
+
     @property
     @async_func
     async def episodes(self):
@@ -616,20 +765,40 @@ class Series(Folder):
     @property
     @async_func
     async def episodes_force(self):
-        items = await self.connector.getJson(
-            '/Shows/{}/Episodes'.format(self.id),
-            remote            = False,
-            format            = 'json',
-            SortOrder         = 'Ascending',
-            SortBy            = 'SortName',
-            Recursive         = 'true',
-            pass_uid          = True,
-            Fields            = 'Path,ParentId,Overview'
-        )
-        items = await self.process(items)
+        path, params = self._episodes_query()
+        items = await self._get_objects(path, **params)
         self.extras['episodes'] = items
         return items
 
+    @async_func
+    async def iter_episodes(self, limit=None, concurrency=None, fields=None):
+        '''iterate over the episodes of the show, one page at a time
+
+        |coro|
+
+        Same parameters as `Folder.iter_items`
+
+        Yields
+        ------
+        :class:`embypy.objects.Episode`
+        '''
+        path, params = self._episodes_query(fields)
+        async for item in self._iter_objects(
+            path, limit, concurrency, **params
+        ):
+            yield item
+
+    def _episodes_query(self, fields=None):
+        return '/Shows/{}/Episodes'.format(self.id), {
+            'remote'		: False,
+            'format'		: 'json',
+            'SortOrder'		: 'Ascending',
+            'SortBy'		: 'SortName',
+            'Recursive'		: 'true',
+            'pass_uid'		: True,
+            **self._fields_params('Path,ParentId,Overview', fields),
+        }
+
 # Game
 class GameSystem(Folder):
     '''Class representing emby game systems objects
@@ -641,5 +810,7 @@ class GameSystem(Folder):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
@@ -13,6 +13,17 @@ class Audio(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+    stream_path = '/Audio/{Id}/universal'
+    stream_query = {
+        'MaxStreamingBitrate': 140000000,
+        'Container': 'opus',
+        'TranscodingContainer': 'opus',
+        'AudioCodec': 'opus',
+        'MaxSampleRate': 48000,
+        'PlaySessionId': 1496213367201,  # TODO no hard code
+    }
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -126,17 +137,9 @@ class Audio(EmbyObject):
     @property
     def stream_url(self):
         '''stream for this song - not re-encoded'''
-        path = '/Audio/{}/universal'.format(self.id)
-        return self.connector.get_url(
-            path,
-            userId=self.connector.userid,
-            MaxStreamingBitrate=140000000,
-            Container='opus',
-            TranscodingContainer='opus',
-            AudioCodec='opus',
-            MaxSampleRate=48000,
-            PlaySessionId=1496213367201  # TODO no hard code
-        )
+        return self.connector.get_urls(
+            self.stream_path, [self.id], **self.stream_query
+        )[0]
 
 
 class Person(EmbyObject):
@@ -149,6 +152,8 @@ class Person(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -184,6 +189,8 @@ class Image(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -199,6 +206,8 @@ class Game(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -213,6 +222,8 @@ class Photo(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -228,6 +239,8 @@ class Book(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -243,6 +256,8 @@ class Device(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -281,6 +296,8 @@ class User(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -1,7 +1,9 @@
-from embypy.utils.asyncio import async_func
+from embypy.utils.asyncio import async_class, async_func
 
-import arrow
+import asyncio
 import datetime
+from collections import deque
+from itertools import islice
 
 _EMPTY_OBJ = {
     "Id": "",
@@ -52,6 +54,87 @@ _EMPTY_OBJ = {
 }
 
 
+def _parse_iso(ts):
+    # emby sends 7 digit fractions and a `Z` suffix, which
+    # `fromisoformat` does not accept (before python 3.11)
+    if ts[-1] in 'Zz':
+        ts = ts[:-1] + '+00:00'
+    micro = 0
+    dot = ts.find('.')
+    if dot != -1:
+        end = dot + 1
+        while end < len(ts) and ts[end].isdigit():
+            end += 1
+        micro = round(float(ts[dot:end]) * 10**6)
+        ts = ts[:dot] + ts[end:]
+    date = datetime.datetime.fromisoformat(ts)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    if micro:
+        date += datetime.timedelta(microseconds=micro)
+    return date
+
+
+def _parse_date(ts):
+    # timezone aware datetime (utc unless the timestamp says otherwise)
+    if not ts:
+        return None
+    try:
+        return _parse_iso(ts)
+    except ValueError:
+        # not ISO 8601, arrow is slow to import, so only use it if needed
+        import arrow
+        return arrow.get(ts).datetime
+
+
+_TYPES = {}
+
+
+def _object_types(compact=False, only_async=False):
+    # emby type -> class, only built once (on first use, since the
+    # subclasses are defined in modules that import this one)
+    types = _TYPES.get((compact, only_async))
+    if types is not None:
+        return types
+
+    import embypy.objects.folders
+    import embypy.objects.videos
+    import embypy.objects.misc
+
+    types = {
+        'Audio':		embypy.objects.misc.Audio,
+        'Person':		embypy.objects.misc.Person,
+        'Video':		embypy.objects.videos.Video,
+        'Movie':		embypy.objects.videos.Movie,
+        'Trailer':		embypy.objects.videos.Trailer,
+        'AdultVideo':	embypy.objects.videos.AdultVideo,
+        'MusicVideo':	embypy.objects.videos.MusicVideo,
+        'Episode':		embypy.objects.videos.Episode,
+        'Folder':		embypy.objects.folders.Folder,
+        'Playlist':		embypy.objects.folders.Playlist,
+        'BoxSet':		embypy.objects.folders.BoxSet,
+        'MusicAlbum':	embypy.objects.folders.MusicAlbum,
+        'MusicArtist':	embypy.objects.folders.MusicArtist,
+        'Season':		embypy.objects.folders.Season,
+        'Series':		embypy.objects.folders.Series,
+        'Game':		embypy.objects.misc.Game,
+        'GameSystem':	embypy.objects.folders.GameSystem,
+        'Photo':		embypy.objects.misc.Photo,
+        'Book':		embypy.objects.misc.Book,
+        'Image':		embypy.objects.misc.Image,
+        'Device':		embypy.objects.misc.Device,
+        'User':		embypy.objects.misc.User,
+        'Default':		EmbyObject,
+    }
+    if compact:
+        from embypy.objects.compact import compact_class
+        types = {key: compact_class(cls) for key, cls in types.items()}
+    if only_async:
+        types = {key: async_class(cls) for key, cls in types.items()}
+    _TYPES[compact, only_async] = types
+    return types
+
+
 class EmbyObject(object):
     '''Deafult EMby Object Template
 
@@ -66,14 +149,19 @@ class EmbyObject(object):
       saves space/increases speed/reduces issues
       only set to false if creating a temp object that will be thrown out
     '''
-    known_objects = {}
+    # `__dict__` is only created if other attributes are set on an object
+    __slots__ = (
+        'connector', 'object_dict', '_extras', '_dates', '__dict__',
+        '__weakref__',
+    )
 
     def __init__(self, object_dict, connector, save=True):
         self.connector = connector
         self.object_dict = object_dict
-        self.extras = {}
+        self._extras = None
+        self._dates = None
         if save:
-            EmbyObject.known_objects[object_dict.get('Id')] = self
+            connector.object_cache.put(object_dict.get('Id'), self)
 
     def __eq__(self, other):
         return isinstance(other, EmbyObject) and self.id == other.id
@@ -88,6 +176,73 @@ class EmbyObject(object):
             return self.__getattr__(name[:-5])
         return self.__getattribute__(name)
 
+    @property
+    def extras(self):
+        '''cached results of list properties (created on first use)'''
+        if self._extras is None:
+            self._extras = {}
+        return self._extras
+
+    @extras.setter
+    def extras(self, value):
+        self._extras = value
+
+    def _date(self, key, ts):
+        # parsed `ts` (value of `key`), cached until the value changes
+        dates = self._dates
+        if dates is None:
+            dates = self._dates = {}
+        else:
+            cached = dates.get(key)
+            if cached is not None and cached[0] == ts:
+                return cached[1]
+        date = _parse_date(ts)
+        dates[key] = (ts, date)
+        return date
+
+    def _set_date(self, key, value):
+        if isinstance(value, datetime.datetime):
+            value = value.strftime("%Y-%m-%dT%H:%M:%SZ")
+        elif not isinstance(value, str):
+            raise ValueError('value must be datetime or str')
+        if self._dates is not None:
+            self._dates.pop(key, None)
+        self.object_dict[key] = value
+
+    def _merge(self, object_dict):
+        # add newer info from emby to the existing info
+        self.object_dict.update(object_dict)
+
+    def _fields_params(self, default, fields=None):
+        # query params selecting the fields of listed items,
+        # `fields` (or the connector's `fields`) replaces `default`
+        if fields is None:
+            fields = self.connector.fields
+        if fields is None:
+            fields = default
+        if fields is None:
+            return {}
+        if not fields or fields == 'ids':
+            # only the basic info (id, name, type, ...)
+            return {
+                'Fields':		'',
+                'EnableImages':		'false',
+                'EnableUserData':	'false',
+            }
+        if not isinstance(fields, str):
+            fields = ','.join(fields)
+        return {'Fields': fields}
+
+    @property
+    def known_objects(self):
+        '''cache of objects already created for this connection
+
+        See Also
+        --------
+          embypy.utils.ObjectCache :
+        '''
+        return self.connector.object_cache
+
     @property
     def id(self):
         '''string with hexidecimal hash representing the id of this
@@ -279,34 +434,20 @@ class EmbyObject(object):
     @property
     def premier_date(self):
         """datetime of when the item premiered (aired/released) (or None)"""
-        ts = self.object_dict.get('PremiereDate')
-        if not ts:
-            return None
-        return arrow.get(ts).datetime
+        return self._date('PremiereDate', self.object_dict.get('PremiereDate'))
 
     @premier_date.setter
     def premier_date(self, value):
-        if isinstance(value, datetime.datetime):
-            value = value.strftime("%Y-%m-%dT%H:%M:%SZ")
-        elif not isinstance(value, str):
-            raise ValueError('value must be datetime or str')
-        self.object_dict['PremiereDate'] = value
+        self._set_date('PremiereDate', value)
 
     @property
     def date_created(self):
         """datetime of when the item was added to the server (or None)"""
-        ts = self.object_dict.get('DateCreated')
-        if not ts:
-            return None
-        return arrow.get(ts).datetime
+        return self._date('DateCreated', self.object_dict.get('DateCreated'))
 
     @date_created.setter
     def date_created(self, value):
-        if isinstance(value, datetime.datetime):
-            value = value.strftime("%Y-%m-%dT%H:%M:%SZ")
-        elif not isinstance(value, str):
-            raise ValueError('value must be datetime or str')
-        self.object_dict['DateCreated'] = value
+        self._set_date('DateCreated', value)
 
     @property
     def parent_id(self):
@@ -370,12 +511,21 @@ class EmbyObject(object):
           post :
         '''
         path = 'Users/{{UserId}}/Items/{}'.format(self.id)
-        info = await self.connector.getJson(
-            path,
-            remote=False,
-            Fields='Path,Overview,PremiereDate'+(',' if fields else '')+fields
-        )
-        self.object_dict.update(info)
+        params = self._fields_params('Path,Overview,PremiereDate')
+        if fields:
+            params['Fields'] = ','.join(
+                filter(None, [params.get('Fields'), fields])
+            )
+        info = await self.connector.getJson(path, remote=False, **params)
+        records = self.connector.records
+        if records is not None:
+            # only keep the schema's keys (and the ones asked for)
+            record = records(info)
+            for key in fields.split(',') if fields else ():
+                if key in info:
+                    record[key] = info[key]
+            info = record
+        self._merge(info)
         self.extras = {}
         return self
 
@@ -408,7 +558,16 @@ class EmbyObject(object):
         '''
         # Why does the whole dict need to be sent?
         #   because emby is dumb, and will break if I don't
-        data = {**_EMPTY_OBJ, **self.object_dict}
+        if getattr(self.object_dict, 'partial', False):
+            # records only have some of the info, so get the rest first
+            full = await self.connector.getJson(
+                'Users/{{UserId}}/Items/{}'.format(self.id),
+                remote=False,
+                Fields='Path,Overview,PremiereDate',
+            )
+            data = {**_EMPTY_OBJ, **full, **self.object_dict}
+        else:
+            data = {**_EMPTY_OBJ, **self.object_dict}
 
         path = 'Items/{}'.format(self.id)
         status, resp = await self.connector.post(
@@ -419,7 +578,9 @@ class EmbyObject(object):
             headers={'Content-Type': 'application/json'},
         )
         if status in (400, 415):
-            await EmbyObject(self.object_dict, self.connector).update()
+            await EmbyObject(
+                self.object_dict, self.connector, save=False
+            ).update()
             status, resp = await self.connector.post(
                 path,
                 data=data,
@@ -441,6 +602,137 @@ class EmbyObject(object):
         '''
         return await self.send()
 
+    async def _iter_pages(self, path, limit=None, concurrency=None, **params):
+        # the first page tells us how many items there are in total,
+        # the next few pages can then be requested ahead of time while
+        # the caller is still busy with the current one
+        limit = limit or self.connector.page_size
+        concurrency = concurrency or self.connector.page_concurrency
+
+        async def get_page(start, limit):
+            resp = await self.connector.getJson(
+                path, startIndex=start, limit=limit, **params
+            )
+            return resp.get('Items', [])
+
+        resp = await self.connector.getJson(
+            path, startIndex=0, limit=limit, **params
+        )
+        items = resp.get('Items', [])
+        total = int(resp.get('TotalRecordCount', -1))
+        size = min(limit, len(items))
+        count = len(items)
+        yield items
+        if not size:
+            return
+
+        if total > count:
+            starts = iter(range(size, total, size))
+            pending = deque()
+            try:
+                while True:
+                    for start in islice(starts, concurrency - len(pending)):
+                        pending.append(asyncio.ensure_future(
+                            get_page(start, size)
+                        ))
+                    if not pending:
+                        break
+                    items = await pending.popleft()
+                    count += len(items)
+                    yield items
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        # server did not report a total (or items were added while
+        # fetching), fall back to walking the remaining pages in order
+        while total == -1 or count < total:
+            items = await get_page(count, limit)
+            if not items:
+                break
+            count += len(items)
+            yield items
+
+    async def _get_pages(self, path, limit=None, concurrency=None, **params):
+        items = []
+        async for page in self._iter_pages(path, limit, concurrency, **params):
+            items.extend(page)
+        return items
+
+    async def _iter_objects(self, path, limit=None, concurrency=None,
+                            **params):
+        async for page in self._iter_pages(path, limit, concurrency, **params):
+            for item in await self.process(page):
+                yield item
+
+    async def _get_objects(self, path, limit=None, concurrency=None,
+                           **params):
+        items = await self._get_pages(path, limit, concurrency, **params)
+        return await self.process(items)
+
+    @async_func
+    async def process_ids(
+        self, ids, chunk_size=100, refresh=False, fields=None
+    ):
+        '''[for internal use] get objects for a list of ids
+
+        |coro|
+
+        Parameters
+        ----------
+        ids : list
+          emby ids of the objects
+        chunk_size : int, optional
+          max number of ids to look up per request
+        refresh : bool, optional
+          if true, already created objects are requested again (updated)
+        fields : str, optional
+          fields to request for each object, `ids` for only the basic
+          info (default: connector's `fields` or `Path,Overview,PremiereDate`)
+
+        Notes
+        -----
+        Ids of objects that were already created are not requested again
+        (unless `refresh` is set), the rest are requested in chunks
+        of `chunk_size`.
+
+        Returns
+        -------
+        list
+          objects in the same order as `ids` (None for ids not found)
+        '''
+        found = {}
+        missing = []
+        for itemId in ids:
+            if not itemId or itemId in found:
+                continue
+            found[itemId] = None if refresh else \
+                self.known_objects.get(itemId)
+            if found[itemId] is None:
+                missing.append(itemId)
+
+        sem = asyncio.Semaphore(self.connector.page_concurrency)
+        params = self._fields_params('Path,Overview,PremiereDate', fields)
+
+        async def get_chunk(chunk):
+            async with sem:
+                return await self.connector.getJson(
+                    '/Users/{UserId}/Items',
+                    remote	= False,
+                    Ids		= ','.join(chunk),
+                    **params
+                )
+
+        chunks = await asyncio.gather(*(
+            get_chunk(missing[i:i+chunk_size])
+            for i in range(0, len(missing), chunk_size)
+        ))
+        for chunk in chunks:
+            for obj in await self.process(chunk):
+                if isinstance(obj, EmbyObject):
+                    found[obj.id] = obj
+        return [found.get(itemId) for itemId in ids]
+
     @async_func
     async def process(self, object_dict):
         '''[for internal use] convert json/dict into python object
@@ -455,7 +747,8 @@ class EmbyObject(object):
         Notes
         -----
         if a string is given, it is assumed to be an id, obj is returned.
-        if a list is given, this method is called for each item in list.
+        if a list is given, this method is called for each item in list
+        (ids in the list are looked up together, see `process_ids`).
 
         Returns
         -------
@@ -468,7 +761,7 @@ class EmbyObject(object):
         # and update it to get full dict
         try:
             if type(object_dict) == str:
-                existing = EmbyObject.known_objects.get(object_dict)
+                existing = self.known_objects.get(object_dict)
                 if existing:
                     return existing
 
@@ -494,71 +787,60 @@ class EmbyObject(object):
 
         # if a list was given,
         #   process each item in list
-        if type(object_dict) == list:
+        #   (ids are looked up together, rather than one at a time)
+        if type(object_dict) in (list, tuple):
+            ids = [item for item in object_dict if type(item) == str]
+            if ids:
+                found = dict(zip(ids, await self.process_ids(ids)))
             items = []
             for item in object_dict:
-                item = await self.process(item)
+                if type(item) == str:
+                    item = found[item]
+                elif type(item) == dict and 'Items' not in item:
+                    item = self._process_dict(item)
+                elif not isinstance(item, EmbyObject):
+                    item = await self.process(item)
                 if item:
                     items.append(item)
             return items
 
         # otherwise we probably have an object dict
         #   so we should process that
+        return self._process_dict(object_dict)
 
+    def _process_dict(self, object_dict):
         # if dict has no id, it's a fake
         if 'Id' not in object_dict and 'ItemId' not in object_dict:
             return object_dict
 
+        if 'AppName' in object_dict:
+            object_dict['Type'] = 'Device'
+        elif 'HasPassword' in object_dict:
+            object_dict['Type'] = 'User'
+
+        # only keep the keys of the type's schema
+        records = self.connector.records
+        if records is not None:
+            object_dict = records(object_dict)
+
         # if object is already stored,
         #   update with existing info and return
         itemId = object_dict.get('Id', object_dict.get('ItemId'))
-        existing = EmbyObject.known_objects.get(itemId)
+        existing = self.known_objects.get(itemId)
         if existing:
-            existing.object_dict.update(object_dict)
+            existing._merge(object_dict)
             return existing
 
-        import embypy.objects.folders
-        import embypy.objects.videos
-        import embypy.objects.misc
-
         # if object is not already stored,
         #   figure out its type (if unknown use this base class)
         #   create an object with subclass of that type
         #   return
-        if 'AppName' in object_dict:
-            object_dict['Type'] = 'Device'
-        elif 'HasPassword' in object_dict:
-            object_dict['Type'] = 'User'
-
-        objects = {
-            'Audio':		embypy.objects.misc.Audio,
-            'Person':		embypy.objects.misc.Person,
-            'Video':		embypy.objects.videos.Video,
-            'Movie':		embypy.objects.videos.Movie,
-            'Trailer':		embypy.objects.videos.Trailer,
-            'AdultVideo':	embypy.objects.videos.AdultVideo,
-            'MusicVideo':	embypy.objects.videos.MusicVideo,
-            'Episode':		embypy.objects.videos.Episode,
-            'Folder':		embypy.objects.folders.Folder,
-            'Playlist':		embypy.objects.folders.Playlist,
-            'BoxSet':		embypy.objects.folders.BoxSet,
-            'MusicAlbum':	embypy.objects.folders.MusicAlbum,
-            'MusicArtist':	embypy.objects.folders.MusicArtist,
-            'Season':		embypy.objects.folders.Season,
-            'Series':		embypy.objects.folders.Series,
-            'Game':		embypy.objects.misc.Game,
-            'GameSystem':	embypy.objects.folders.GameSystem,
-            'Photo':		embypy.objects.misc.Photo,
-            'Book':		embypy.objects.misc.Book,
-            'Image':		embypy.objects.misc.Image,
-            'Device':		embypy.objects.misc.Device,
-            'User':		embypy.objects.misc.User,
-            'Default':		EmbyObject,
-        }
-        return objects.get(
-            object_dict.get('Type', 'Default'),
-            EmbyObject
-        )(object_dict, self.connector)
+        types = _object_types(
+            self.connector.compact and records is None,
+            self.connector.only_async,
+        )
+        cls = types.get(object_dict.get('Type'), types['Default'])
+        return cls(object_dict, self.connector)
 
     def __str__(self):
         return self.name
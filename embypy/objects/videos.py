@@ -13,6 +13,10 @@ class Video(EmbyObject):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+    stream_path = '/Videos/{Id}/stream.mp4'
+    stream_query = {'attach_api_key': False}
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -29,8 +33,9 @@ class Video(EmbyObject):
     @property
     def stream_url(self):
         '''stream url (as an mp4)'''
-        path = '/Videos/{}/stream.mp4'.format(self.id)
-        return self.connector.get_url(path, attach_api_key=False)
+        return self.connector.get_urls(
+            self.stream_path, [self.id], **self.stream_query
+        )[0]
 
 
 # Videos
@@ -44,6 +49,8 @@ class Movie(Video):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -63,6 +70,8 @@ class Episode(Video):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -165,6 +174,8 @@ class Trailer(Video):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -179,6 +190,8 @@ class AdultVideo(Video):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
 
@@ -193,5 +206,7 @@ class MusicVideo(Video):
       connector : embypy.utils.connector.Connector
         same as for `EmbyObject`
     '''
+    __slots__ = ()
+
     def __init__(self, object_dict, connector):
         super().__init__(object_dict, connector)
@@ -1,3 +1,9 @@
 #!/usr/bin/env python3
 
 from embypy.utils.connector import Connector
+from embypy.utils.cache import ObjectCache, ResponseCache
+from embypy.utils.snapshot import Snapshot
+from embypy.utils.limiter import Limiter
+from embypy.utils.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from embypy.utils.urls import UrlBuilder
+from embypy.utils.records import Record, Records
@@ -1,9 +1,17 @@
 import asyncio
+import atexit
+import functools
 import inspect
 import threading
+import weakref
 
 
-_loop_lock = threading.RLock()
+_loop_lock = threading.Lock()
+_loop = None
+_loop_thread = None
+
+# objects with a `close` coroutine, closed on the background loop at exit
+_closeables = weakref.WeakSet()
 
 
 def is_asyncio_context() -> bool:
@@ -20,31 +28,186 @@ def is_asyncio_context() -> bool:
 
 
 def async_func(func):
-    def tmp_func(*args, **kargs):
-        return _run_func(func, *args, **kargs)
+    # the kind of function is only checked once (not on every call)
+    if inspect.isasyncgenfunction(func):
+        def tmp_func(*args, **kargs):
+            out = func(*args, **kargs)
+            if is_asyncio_context():
+                return out
+            return iter_over_async(out, _get_loop())
+    elif inspect.iscoroutinefunction(func):
+        def tmp_func(*args, **kargs):
+            out = func(*args, **kargs)
+            if is_asyncio_context():
+                return out
+            return _run_sync(out)
+    else:
+        def tmp_func(*args, **kargs):
+            return _run_func(func, *args, **kargs)
+    functools.update_wrapper(tmp_func, func)
+    tmp_func._async_func = True
     return tmp_func
 
 
+def unwrap_async(value):
+    '''the original function of an `async_func` (or None)'''
+    if getattr(value, '_async_func', False):
+        return value.__wrapped__
+    return None
+
+
+_async_classes = {}
+
+
+def async_class(cls):
+    '''get a subclass of `cls` that is only used from async code
+
+    The methods and properties decorated with `async_func` are replaced
+    by the original coroutine functions, so calls skip the check for
+    a running event loop.
+    '''
+    new_cls = _async_classes.get(cls)
+    if new_cls is not None:
+        return new_cls
+
+    attrs = {}
+    for klass in reversed(cls.__mro__):
+        attrs.update(vars(klass))
+
+    namespace = {
+        '__slots__': (),
+        '__module__': cls.__module__,
+        '__doc__': cls.__doc__,
+    }
+    for name, value in attrs.items():
+        if isinstance(value, property):
+            fget = unwrap_async(value.fget)
+            if fget is not None:
+                namespace[name] = property(
+                    fget, value.fset, value.fdel, value.__doc__
+                )
+        else:
+            func = unwrap_async(value)
+            if func is not None:
+                namespace[name] = func
+
+    new_cls = type(cls.__name__, (cls,), namespace)
+    _async_classes[cls] = new_cls
+    return new_cls
+
+
 def _get_loop():
-    try:
-        return asyncio.get_event_loop()
-    except RuntimeError:
-        return asyncio.new_event_loop()
+    # event loop (running in a background thread) that sync calls are
+    # sent to, so that threads can share it (and its connections)
+    global _loop, _loop_thread
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=loop.run_forever,
+                name='embypy-loop',
+                daemon=True,
+            )
+            _loop_thread.start()
+            atexit.register(_stop_loop)
+            _loop = loop
+    return _loop
+
+
+def _stop_loop():
+    global _loop, _loop_thread
+    with _loop_lock:
+        loop, thread = _loop, _loop_thread
+        _loop = _loop_thread = None
+    if loop is None:
+        return
+    asyncio.run_coroutine_threadsafe(_shutdown(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
 
 
-def iter_over_async(ait, loop):
+async def _shutdown():
+    # cancel what is still running (e.g. abandoned sync iterators)
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.gather(
+        *(obj.close() for obj in list(_closeables)), return_exceptions=True
+    )
+    await asyncio.get_running_loop().shutdown_asyncgens()
+
+
+def close_at_exit(obj):
+    '''close `obj` (by awaiting `obj.close()`) on the background loop
+    before it is stopped at exit
+
+    Used for connections that sync calls leave open.
+    '''
+    _closeables.add(obj)
+
+
+def _run_sync(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+# max number of items an async generator used from sync code can be
+# ahead of the code using it
+ASYNC_ITER_BUFFER = 256
+
+
+class _End:
+    def __init__(self, error=None):
+        self.error = error
+
+
+def iter_over_async(ait, loop, buffer_size=None):
+    # the async generator runs as a task on `loop`, filling a queue,
+    # and items are taken from the queue in batches (all that are ready)
+    buffer_size = buffer_size or ASYNC_ITER_BUFFER
     ait = ait.__aiter__()
-    async def get_next():
+    queue = task = None
+
+    async def produce():
         try:
-            obj = await ait.__anext__()
-            return False, obj
-        except StopAsyncIteration:
-            return True, None
-    while True:
-        done, obj = loop.run_until_complete(get_next())
-        if done:
-            break
-        yield obj
+            async for item in ait:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(_End(e))
+        else:
+            await queue.put(_End())
+
+    async def start():
+        nonlocal queue, task
+        queue = asyncio.Queue(buffer_size)
+        task = asyncio.ensure_future(produce())
+
+    async def get_items():
+        items = [await queue.get()]
+        while not queue.empty():
+            items.append(queue.get_nowait())
+        return items
+
+    asyncio.run_coroutine_threadsafe(start(), loop).result()
+    try:
+        while True:
+            items = asyncio.run_coroutine_threadsafe(
+                get_items(), loop
+            ).result()
+            for item in items:
+                if isinstance(item, _End):
+                    if item.error is not None:
+                        raise item.error
+                    return
+                yield item
+    finally:
+        # the loop is closed if this runs at exit (it cancelled the task)
+        if task is not None and not task.done() and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
 
 
 def _run_func(func, *args, **kwargs):
@@ -54,9 +217,7 @@ def _run_func(func, *args, **kwargs):
     if is_asyncio_context():
         return out
     elif inspect.isasyncgen(out):
-        with _loop_lock:
-            return iter_over_async(out, _get_loop())
+        return iter_over_async(out, _get_loop())
     elif inspect.iscoroutinefunction(func):
-        with _loop_lock:
-            return _get_loop().run_until_complete(out)
+        return _run_sync(out)
     return out
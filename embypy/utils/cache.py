@@ -0,0 +1,216 @@
+from collections import OrderedDict, namedtuple
+from fnmatch import fnmatch
+import time
+import weakref
+
+
+class ObjectCache:
+    '''Identity cache for emby objects, keyed by item id
+
+    Parameters
+    ----------
+    max_size : int, optional
+      max number of objects to keep, least recently used objects are
+      evicted first (default unbounded)
+    ttl : float, optional
+      number of seconds an object is kept after it was stored
+      (default forever)
+    weak : bool, optional
+      if true, only weak references are kept - objects are dropped
+      as soon as nothing else uses them (default False)
+
+    Attributes
+    ----------
+    hits : int
+      number of lookups that found an object
+    misses : int
+      number of lookups that did not find an object
+    evictions : int
+      number of objects dropped because of size, age, or garbage collection
+
+    Notes
+    -----
+    A custom cache can be passed to the connector (`object_cache`),
+    it only needs to implement `get`, `put`, `pop`, and `clear`.
+    '''
+    def __init__(self, max_size=None, ttl=None, weak=False):
+        self.max_size	= max_size
+        self.ttl	= ttl
+        self.weak	= weak
+        self.hits	= 0
+        self.misses	= 0
+        self.evictions	= 0
+        self._items	= OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def _lookup(self, key):
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if self.weak:
+            value = value()
+        if value is None or (expires and expires <= time.monotonic()):
+            del self._items[key]
+            self.evictions += 1
+            return None
+        return value
+
+    def _discard(self, key, ref):
+        # weakref callback, only remove the entry if it was not replaced
+        entry = self._items.get(key)
+        if entry and entry[1] is ref:
+            del self._items[key]
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        '''get the object stored for `key` (or `default`)'''
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, obj):
+        '''store `obj` under `key`, evicting old objects if needed'''
+        if key is None:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        if self.weak:
+            obj = weakref.ref(obj, lambda ref: self._discard(key, ref))
+        self._items[key] = (expires, obj)
+        self._items.move_to_end(key)
+        while self.max_size is not None and len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        '''remove and return the object stored for `key`'''
+        value = self._lookup(key)
+        self._items.pop(key, None)
+        return default if value is None else value
+
+    def clear(self):
+        '''remove all objects'''
+        self._items.clear()
+
+    @property
+    def stats(self):
+        '''dict with the hit/miss/eviction counters and current size'''
+        return {
+            'size'		: len(self._items),
+            'hits'		: self.hits,
+            'misses'		: self.misses,
+            'evictions'	: self.evictions,
+        }
+
+
+_Response = namedtuple('_Response', 'value expires etag last_modified')
+
+
+class ResponseCache:
+    '''LRU cache of responses to GET requests
+
+    Parameters
+    ----------
+    ttl : dict, optional
+      paths (fnmatch patterns, e.g. `/Users*`) to the number of seconds
+      responses are kept, `default` is used for other paths (default: not
+      kept). Paths are matched before `{UserId}` is filled in.
+    max_size : int, optional
+      max number of responses to keep (default 256)
+
+    Attributes
+    ----------
+    hits : int
+      number of requests answered from the cache
+    misses : int
+      number of requests sent to emby
+    revalidated : int
+      number of expired responses that emby confirmed are still valid
+    evictions : int
+      number of responses dropped to stay under `max_size`
+
+    Notes
+    -----
+    Expired responses that came with an `ETag` or `Last-Modified` header
+    are kept around, so they can be revalidated with a conditional
+    request instead of being downloaded again.
+    '''
+    default_ttl = {
+        '/system/info/public': 300,
+        '/Users': 60,
+        '/Devices': 60,
+    }
+
+    def __init__(self, ttl=None, max_size=256):
+        self.ttl		= self.default_ttl if ttl is None else ttl
+        self.max_size		= max_size
+        self.hits		= 0
+        self.misses		= 0
+        self.revalidated	= 0
+        self.evictions		= 0
+        self._ttl_cache		= {}
+        self._items		= OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def ttl_for(self, path):
+        '''number of seconds responses for `path` are kept (0 = never)'''
+        ttl = self._ttl_cache.get(path)
+        if ttl is None:
+            ttl = next(
+                (t for p, t in self.ttl.items()
+                 if p != 'default' and fnmatch(path, p)),
+                self.ttl.get('default', 0),
+            ) or 0
+            self._ttl_cache[path] = ttl
+        return ttl
+
+    def get(self, key):
+        '''get the stored response for `key`
+
+        Returns
+        -------
+        tuple
+          the stored response (value, expires, etag, last_modified) and
+          whether it is still fresh, or (None, False)
+        '''
+        entry = self._items.get(key)
+        if entry is None:
+            return None, False
+        self._items.move_to_end(key)
+        return entry, entry.expires > time.monotonic()
+
+    def put(self, key, value, ttl, etag=None, last_modified=None):
+        '''store a response for `ttl` seconds'''
+        self._items[key] = _Response(
+            value, time.monotonic() + ttl, etag, last_modified
+        )
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        '''remove all responses'''
+        self._items.clear()
+
+    @property
+    def stats(self):
+        '''dict with the counters and current size'''
+        return {
+            'size'		: len(self._items),
+            'hits'		: self.hits,
+            'misses'		: self.misses,
+            'revalidated'	: self.revalidated,
+            'evictions'		: self.evictions,
+        }
@@ -1,16 +1,24 @@
+import contextlib
 import json
+import logging
 import time
-from requests.compat import urlparse, urlunparse, urlencode
 import asyncio
 import aiohttp
 import datetime
 from collections import deque
-import websockets
-import random
 import ssl
+from urllib.parse import urlparse
 
-from embypy import __version__
-from embypy.utils.asyncio import async_func
+import embypy
+from embypy.utils.asyncio import async_func, close_at_exit
+from embypy.utils.cache import ObjectCache, ResponseCache
+from embypy.utils.decoders import get_decoder
+from embypy.utils.limiter import Limiter
+from embypy.utils.retry import CircuitBreaker, RetryPolicy
+from embypy.utils.urls import UrlBuilder
+from embypy.utils.records import Records
+
+logger = logging.getLogger(__name__)
 
 
 class WebSocket:
@@ -20,15 +28,28 @@ class WebSocket:
     ----------
     conn : embypy.utils.Connector
       connector object
-    url : str
-      uri of websocet server
+    url : str, optional
+      uri of websocet server (default: websocket of the emby server)
     ssl_str : str
       path to the ssl certificate for confirmation
+
+    Notes
+    -----
+    Functions in `on_message` are called with this object and the message
+    (a json string). Exceptions raised by them are logged, and the next
+    messages are still handled.
+
+    If the connection is lost, it is opened again (waiting longer after
+    each failed try, see `embypy.utils.RetryPolicy`) until `close` is
+    called.
     '''
-    def __init__(self, conn, url, ssl_str=None):
+    def __init__(self, conn, url=None, ssl_str=None):
         self.on_message = []
         self.url	= url
         self.conn	= conn
+        self.ws	= None
+        self._task	= None
+        self._keep_alive_task = None
         if type(ssl_str) == str:
             self.ssl = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
             self.ssl.load_verify_locations(cafile=ssl_str)
@@ -45,22 +66,114 @@ class WebSocket:
             return self.__getattr__(name[:-5])
         return self.__getattribute__(name)
 
-    def connect(self):
-        '''Establish a connection'''
-        # TODO - authenticate to emby
-        #self.loop.create_task(self.handler())
+    @async_func
+    async def connect(self):
+        '''Establish a connection, messages are then handled in the background
+
+        |coro|
+
+        Returns
+        -------
+        asyncio.Task
+          task running `handler` (the same one if already connected)
+        '''
+        if self._task is not None and not self._task.done():
+            return self._task
+        self.ws = await self._open()
+        self._task = asyncio.ensure_future(self.handler())
+        return self._task
+
+    async def _open(self):
+        await self.conn.login_if_needed()
+        url = self.url
+        if not url:
+            if await self.conn.is_jellyfin:
+                path = '/socket'
+            else:
+                path = '/embywebsocket'
+            url = self.conn.get_url(path, websocket=True, remote=False)
+
+        options = {}
+        if isinstance(self.ssl, ssl.SSLContext) and url.startswith('wss'):
+            options['ssl'] = self.ssl
+
+        import websockets
+        return await websockets.connect(url, **options)
 
     @async_func
     async def handler(self):
-        '''Handle loop, get and process messages'''
-        self.ws = await websockets.connect(self.url, ssl=self.ssl)
-        while self.ws:
-            message = await self.ws.recv()
-            for handle in self.on_message:
+        '''Handle loop, get and process messages
+
+        |coro|
+        '''
+        import websockets
+        ws = self.ws
+        delay = None
+        try:
+            while ws is not None:
+                opened = time.monotonic()
+                try:
+                    async for message in ws:
+                        await self._handle(message)
+                except websockets.ConnectionClosed:
+                    pass
+                # only reconnect right away if the connection was up a while
+                if time.monotonic() - opened > self.conn.retry_policy.cap:
+                    delay = None
+                ws, delay = await self._reconnect(ws, delay)
+        finally:
+            if ws is not None and self.ws is ws:
+                await self.close()
+
+    async def _handle(self, message):
+        try:
+            data = json.loads(message)
+        except ValueError:
+            data = {}
+        if data.get('MessageType') == 'ForceKeepAlive':
+            self._start_keep_alive(data.get('Data') or 60)
+        for handle in self.on_message:
+            try:
                 if asyncio.iscoroutinefunction(handle):
                     await handle(self, message)
                 else:
                     handle(self, message)
+            except Exception:
+                logger.exception('websocket message handler %r failed', handle)
+
+    async def _reconnect(self, ws, delay=None):
+        # new connection to replace `ws` (None once `close` was called),
+        # and the delay to wait before the next reconnect
+        while self.ws is ws:
+            if delay is not None:
+                await asyncio.sleep(delay)
+            delay = self.conn.retry_policy.next_delay(delay)
+            try:
+                new = await self._open()
+            except Exception as e:
+                logger.warning('websocket reconnect failed: %r', e)
+                continue
+            if self.ws is not ws:
+                await new.close()
+                break
+            self.ws = new
+            return new, delay
+        return None, delay
+
+    def _start_keep_alive(self, timeout):
+        # emby drops connections that don't send anything for `timeout`
+        async def keep_alive():
+            import websockets
+            while self.ws:
+                try:
+                    await self.send(json.dumps({'MessageType': 'KeepAlive'}))
+                except websockets.ConnectionClosed:
+                    pass
+                await asyncio.sleep(timeout / 2)
+
+        if self._keep_alive_task:
+            self._keep_alive_task.cancel()
+        self._keep_alive_task = asyncio.ensure_future(keep_alive())
 
     @async_func
     async def send(self, message):
@@ -68,10 +181,27 @@ class WebSocket:
             return False
         return await self.ws.send(message)
 
-    def close(self):
-        '''close connection to socket'''
-        self.ws.close()
-        self.ws = None
+    @async_func
+    async def close(self):
+        '''close connection to socket (and stop reconnecting)
+
+        |coro|
+        '''
+        ws, self.ws = self.ws, None
+        task, self._task = self._task, None
+        if self._keep_alive_task:
+            self._keep_alive_task.cancel()
+            self._keep_alive_task = None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        if ws:
+            await ws.close()
+
+
+@contextlib.asynccontextmanager
+async def _no_limit():
+    # `contextlib.nullcontext` only supports `async with` from python 3.10
+    yield
 
 
 class Connector:
@@ -101,6 +231,58 @@ class Connector:
       number of seconds to wait before timeout for a request
     tries : int
       number of times to try a request before throwing an error
+    max_retry_time : float, optional
+      stop retrying a request after this many seconds
+    retry_policy : embypy.utils.RetryPolicy, optional
+      decides when requests are retried (used instead of `tries`)
+    circuit_breaker : embypy.utils.CircuitBreaker or bool, optional
+      stops sending requests while the server is down,
+      True to use the default one (off by default)
+    page_concurrency : int
+      max number of pages of a listing that are requested at the same time
+    page_size : int, optional
+      number of items requested per page by folder listings (default 200)
+    object_cache : embypy.utils.ObjectCache, optional
+      cache used to keep track of already created objects
+    cache_size : int, optional
+      max number of objects in the default object cache
+    cache_ttl : float, optional
+      seconds objects are kept in the default object cache
+    cache_weak : bool, optional
+      if true, the default object cache only keeps weak references
+    compact : bool, optional
+      if true, memory efficient objects are created (see notes)
+    fields : str or list, optional
+      fields requested for listed items instead of the default ones,
+      `ids` to only get the basic info (id, name, type, ...)
+    records : bool, list, or embypy.utils.Records, optional
+      if set, only the json keys used by the object classes (and
+      the extra keys in the list) are kept, see notes
+    json_decoder : str or callable, optional
+      `json`, `orjson`, `msgspec`, or a function used to decode responses,
+      the default (`auto`) uses the fastest one that is installed
+    coalesce : bool, optional
+      if true (default), identical json requests that are in flight at
+      the same time are only sent once
+    pool_limit : int, optional
+      max number of open connections (default 100, 0 for no limit)
+    pool_limit_per_host : int, optional
+      max number of open connections to the same host (default no limit)
+    keepalive_timeout : float, optional
+      seconds idle connections are kept open for reuse (default 60)
+    dns_cache_ttl : float, optional
+      seconds dns lookups are cached (default 300)
+    max_requests : int, optional
+      max number of requests in flight at once (default no limit)
+    rate_limit : float, optional
+      max number of requests per second (default no limit)
+    limits : dict, optional
+      stricter limits for some paths (see `embypy.utils.Limiter`)
+    limiter : embypy.utils.Limiter, optional
+      used instead of `max_requests`/`rate_limit`/`limits`
+    response_cache : bool, dict, or embypy.utils.ResponseCache, optional
+      cache responses of GET requests, either True (use default timeouts),
+      or a dict of paths to timeouts (see `ResponseCache`)
     jellyfin : bool
       if this is a jellyfin (false = emby) server
 
@@ -118,6 +300,15 @@ class Connector:
     Jellyfin and emby have some url differences right now,
     so set jellyfin's url scheme to true/false
     [or None (default) for auto-detect]
+
+    Compact objects keep the json info encoded and only decode it when
+    needed, see :class:`embypy.objects.CompactObject`. This is slower,
+    but saves a lot of memory when large libraries are loaded.
+
+    Records (see :class:`embypy.utils.Records`) drop the keys that are
+    not needed and store the rest in slots, which saves memory without
+    slowing down attribute access. They are used instead of compact
+    objects if both are set.
     '''
     def __init__(self, url, **kargs):
         try:
@@ -141,14 +332,62 @@ class Connector:
         self.device_id	= kargs.get('device_id', 'EmbyPy')
         self.timeout	= kargs.get('timeout', 30)
         self.tries	= kargs.get('tries', 3)
+        self.retry_policy = kargs.get('retry_policy') or RetryPolicy(
+            tries=self.tries,
+            max_elapsed=kargs.get('max_retry_time'),
+        )
+        circuit_breaker = kargs.get('circuit_breaker')
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker()
+        self.circuit_breaker = circuit_breaker or None
+        self.page_concurrency = kargs.get('page_concurrency', 4)
+        self.page_size	= kargs.get('page_size', 200)
+        self.compact	= kargs.get('compact', False)
+        self.only_async	= False
+        self.fields	= kargs.get('fields')
+        records		= kargs.get('records')
+        if records is True:
+            records = Records()
+        elif records and not isinstance(records, Records):
+            records = Records(fields=records)
+        self.records	= records or None
+        self.json_loads	= get_decoder(kargs.get('json_decoder', 'auto'))
+        self.coalesce	= kargs.get('coalesce', True)
+        self.pool_limit	= kargs.get('pool_limit', 100)
+        self.pool_limit_per_host = kargs.get('pool_limit_per_host', 0)
+        self.keepalive_timeout = kargs.get('keepalive_timeout', 60)
+        self.dns_cache_ttl	= kargs.get('dns_cache_ttl', 300)
+
+        response_cache = kargs.get('response_cache')
+        if response_cache is True:
+            response_cache = ResponseCache()
+        elif isinstance(response_cache, dict):
+            response_cache = ResponseCache(response_cache)
+        elif response_cache is False:
+            response_cache = None
+        self.response_cache = response_cache
+
+        self.limiter = kargs.get('limiter')
+        limit_args = ('max_requests', 'rate_limit', 'limits')
+        if self.limiter is None and any(kargs.get(k) for k in limit_args):
+            self.limiter = Limiter(
+                max_requests	= kargs.get('max_requests'),
+                rate		= kargs.get('rate_limit'),
+                overrides	= kargs.get('limits'),
+            )
         self.jellyfin	= kargs.get('jellyfin')
+        self.object_cache = kargs.get('object_cache') or ObjectCache(
+            max_size=kargs.get('cache_size'),
+            ttl=kargs.get('cache_ttl'),
+            weak=kargs.get('cache_weak', False),
+        )
         self.url	= urlparse(url)
         self.urlremote	= urlparse(urlremote) if urlremote else urlremote
+        self.urls	= UrlBuilder(self.url, self.urlremote)
 
         self.attempt_login = False
-        self._session_locks = {}
-        self._session_uses = {}
         self._sessions = {}
+        self._in_flight = {}
 
         if self.ssl and type(self.ssl) == str:
             self.ssl = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
@@ -156,7 +395,7 @@ class Connector:
 
         # connect to websocket is user wants to
         if 'ws' in kargs:
-            self.ws = WebSocket(self, self.get_url(websocket=True), self.ssl)
+            self.ws = WebSocket(self, ssl_str=self.ssl)
         else:
             self.ws = None
 
@@ -170,12 +409,12 @@ class Connector:
             return self.__getattr__(name[:-5])
         return self.__getattribute__(name)
 
-    async def _get_session(self):
-        loop = asyncio.get_running_loop()
-        loop_id = hash(loop)
+    def _auth_headers(self):
         auth_header = 'MediaBrowser Client="{0}",Device="{0}",' \
                       'DeviceId="{1}",Version="{2}"'
-        auth_header = auth_header.format('EmbyPy', self.device_id, __version__)
+        auth_header = auth_header.format(
+            'EmbyPy', self.device_id, embypy.__version__
+        )
         if self.token:
             auth_header += f',Token="{self.token}"'
 
@@ -186,34 +425,56 @@ class Connector:
 
         if self.token:
             headers.update({'X-MediaBrowser-Token': self.token})
+        return headers
 
-        async with await self._get_session_lock():
-            session = self._sessions.get(loop_id)
-            if not session:
-                session = aiohttp.ClientSession(
-                    headers=headers,
-                    connector=aiohttp.TCPConnector(ssl_context=self.ssl),
-                )
-                self._sessions[loop_id] = session
-                self._session_uses[loop_id] = 1
-            else:
-                self._session_uses[loop_id] += 1
-            return session
-
-    async def _end_session(self):
+    async def _get_session(self):
+        # one session (and connection pool) per event loop, kept open
+        # until `close` is called (or the sync calls' loop stops at exit)
         loop = asyncio.get_running_loop()
-        loop_id = hash(loop)
-        async with await self._get_session_lock():
-            self._session_uses[loop_id] -= 1
-            session = self._sessions.get(loop_id)
-            if session and self._session_uses[loop_id] <= 0:
-                await session.close()
-                self._sessions[loop_id] = None
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            for old in [k for k in self._sessions if k.is_closed()]:
+                del self._sessions[old]
+            session = aiohttp.ClientSession(
+                headers=self._auth_headers(),
+                connector=aiohttp.TCPConnector(
+                    ssl			= self.ssl,
+                    limit		= self.pool_limit,
+                    limit_per_host	= self.pool_limit_per_host,
+                    keepalive_timeout	= self.keepalive_timeout,
+                    ttl_dns_cache	= self.dns_cache_ttl,
+                ),
+            )
+            self._sessions[loop] = session
+            close_at_exit(self)
+        return session
 
-    async def _get_session_lock(self):
+    def _limit(self, path):
+        if self.limiter is None:
+            return _no_limit()
+        return self.limiter(path)
+
+    @async_func
+    async def close(self):
+        '''close all open connections (and the websocket)
+
+        |coro|
+
+        Notes
+        -----
+        Connections made from other event loops can only be closed from
+        that loop, and are otherwise dropped.
+
+        Connections used by sync calls are closed at exit if this was
+        not called.
+        '''
         loop = asyncio.get_running_loop()
-        self._sessions[loop] = None
-        return self._session_locks.setdefault(loop, asyncio.Lock())
+        sessions, self._sessions = self._sessions, {}
+        for session_loop, session in sessions.items():
+            if session_loop is loop:
+                await session.close()
+        if self.ws:
+            await self.ws.close()
 
     @async_func
     async def info(self):
@@ -263,13 +524,8 @@ class Connector:
             self.userid = data.get('User', {}).get('Id')
             self.api_key = self.token
 
-            session = await self._get_session()
-            auth_header = session._default_headers['X-Emby-Authorization']
-            auth_header += f',Token="{self.token}"'
-            session._default_headers['X-MediaBrowser-Token'] = self.token
-            session._default_headers['Authorization'] = auth_header
-            session._default_headers['X-Emby-Authorization'] = auth_header
-            await self._end_session()
+            for session in self._sessions.values():
+                session._default_headers.update(self._auth_headers())
         finally:
             self.attempt_login = False
 
@@ -307,60 +563,73 @@ class Connector:
         -------
         full url
         '''
-        userId = userId or self.userid
-        if attach_api_key and self.api_key:
-            query.update({
-                'api_key': self.api_key,
-                'deviceId': self.device_id
-            })
-        if pass_uid:
-            query['userId'] = userId
-
-        if remote:
-            url = self.urlremote or self.url
-        else:
-            url = self.url
-
-        if websocket:
-            scheme = url.scheme.replace('http', 'ws')
-        else:
-            scheme = url.scheme
-
-        url = urlunparse(
-            (scheme, url.netloc, path, '', '{params}', '')
-        ).format(
-            UserId	= userId,
-            ApiKey	= self.api_key,
-            DeviceId	= self.device_id,
-            params	= urlencode(query)
+        if attach_api_key and ('api_key' in query or 'deviceId' in query):
+            query = dict(query, api_key=self.api_key, deviceId=self.device_id)
+            attach_api_key = False
+        return self.urls.build(
+            path,
+            query,
+            websocket=websocket,
+            remote=remote,
+            auth=self._auth_query() if attach_api_key else '',
+            user_id=userId or self.userid,
+            pass_uid=pass_uid,
+            ApiKey=self.api_key,
+            DeviceId=self.device_id,
         )
 
-        return url[:-1] if url[-1] == '?' else url
+    def get_urls(self, path, ids, remote=True, attach_api_key=True, **query):
+        '''construct urls for many items at once
 
-    @async_func
-    async def _process_resp(self, resp):
-        if (not resp or resp.status == 401) and self.username:
-            await self.login()
-            return False
-        if not resp:
-            return False
-        if resp.status in (502, 503, 504):
-            await asyncio.sleep(random.random()*4+0.2)
-            return False
-        return True
+        Parameters
+        ----------
+        path : str
+          uri path with an `{Id}` field (e.g. `/Items/{Id}/Images/Primary`)
+        ids : list
+          item ids to construct urls for
+        remote : bool, optional
+          if true, remote-address is used (default True)
+        attach_api_key : bool, optional
+          if true, apikey is added to the query (default True)
+        query : karg dict
+          additional parameters to set (part of url after the `?`)
+
+        Also See
+        --------
+          get_url :
+
+        Returns
+        -------
+        list of urls (in the same order as `ids`)
+        '''
+        return self.urls.build_many(
+            path,
+            ids,
+            query=query,
+            remote=remote,
+            auth=self._auth_query() if attach_api_key else '',
+            user_id=self.userid,
+            ApiKey=self.api_key,
+            DeviceId=self.device_id,
+        )
+
+    def _auth_query(self):
+        return self.urls.auth_query(self.api_key, self.device_id)
 
-    @staticmethod
     @async_func
-    async def resp_to_json(resp):
-        try:
-            return await resp.json()
-        except aiohttp.client_exceptions.ContentTypeError:
+    async def resp_to_json(self, resp):
+        # decode the raw bytes, skipping aiohttp's intermediate str
+        body = await resp.read()
+        if 'json' not in resp.content_type:
             raise RuntimeError(
                 'Unexpected JSON output (status: {}): "{}"'.format(
                     resp.status,
                     await resp.text(),
                 )
             )
+        if not body.strip():
+            return None
+        return self.json_loads(body)
 
     def add_on_message(self, func):
         '''add function that handles websocket messages'''
@@ -369,20 +638,62 @@ class Connector:
     @async_func
     async def _req(self, method, path, params={}, **query):
         await self.login_if_needed()
-        for i in range(self.tries):
+        policy	= self.retry_policy
+        breaker	= self.circuit_breaker
+        idempotent = policy.is_idempotent(getattr(method, '__name__', ''))
+        started	= time.monotonic()
+        delay	= None
+        error	= None
+        tries	= 0
+        while True:
+            if breaker:
+                breaker.before()
+            tries += 1
+            wait = None
+            failed = True
             url = self.get_url(path, **query)
             try:
                 resp = await method(url, timeout=self.timeout, **params)
-                if await self._process_resp(resp):
+            except aiohttp.ClientConnectorError as e:
+                # could not connect, so nothing was sent
+                error, retry = e, True
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                error, retry = e, idempotent
+            else:
+                if resp.status == 401 and self.username:
+                    resp.release()
+                    await self.login()
+                    error, retry, failed = None, True, False
+                elif resp.status in policy.statuses:
+                    retry = idempotent or \
+                        resp.status in policy.not_processed_statuses
+                    # rate limited, but the server is up
+                    failed = resp.status != 429
+                    if not retry:
+                        return resp
+                    wait = policy.retry_after(resp)
+                    error = aiohttp.ClientResponseError(
+                        resp.request_info, resp.history,
+                        status=resp.status, message=resp.reason or '',
+                    )
+                    resp.release()
+                else:
+                    if breaker:
+                        breaker.success()
                     return resp
-                await asyncio.sleep(random.random()*i + 0.2)
-            except asyncio.exceptions.TimeoutError:
-                pass
-            except aiohttp.ClientConnectionError:
-                pass
+
+            if failed and breaker:
+                breaker.failure()
+            delay = policy.next_delay(delay)
+            if wait is None:
+                wait = delay
+            if not retry or not policy.should_retry(tries, started, wait):
+                break
+            await asyncio.sleep(wait)
+
         raise aiohttp.ClientConnectionError(
             'Emby server is probably down'
-        )
+        ) from error
 
     @async_func
     async def get(self, path, **query):
@@ -405,16 +716,7 @@ class Connector:
         requests.models.Response
           the response that was given
         '''
-        try:
-            session = await self._get_session()
-            async with await self._req(
-                session.get,
-                path,
-                **query
-            ) as resp:
-                return resp.status, await resp.text()
-        finally:
-            await self._end_session()
+        return await self._get('text', path, **query)
 
     @async_func
     async def delete(self, path, **query):
@@ -436,16 +738,15 @@ class Connector:
         requests.models.Response
           the response that was given
         '''
-        try:
-            session = await self._get_session()
-            async with await self._req(
-                session.delete,
-                path,
-                **query
-            ) as resp:
-                return resp.status
-        finally:
-            await self._end_session()
+        if self.response_cache is not None:
+            self.response_cache.clear()
+        session = await self._get_session()
+        async with self._limit(path), await self._req(
+            session.delete,
+            path,
+            **query
+        ) as resp:
+            return resp.status
 
     @async_func
     async def post(self, path, data={}, send_raw=False, **query):
@@ -533,24 +834,23 @@ class Connector:
         requests.models.Response
           the response that was given
         '''
-        try:
-            session = await self._get_session()
-            if send_raw:
-                params = {"json": data}
+        if self.response_cache is not None:
+            self.response_cache.clear()
+        session = await self._get_session()
+        if send_raw:
+            params = {"json": data}
+        else:
+            params = {"data": json.dumps(data)}
+        async with self._limit(path), await self._req(
+            session.post,
+            path,
+            params=params,
+            **query
+        ) as resp:
+            if return_json:
+                return await self.resp_to_json(resp)
             else:
-                params = {"data": json.dumps(data)}
-            async with await self._req(
-                session.post,
-                path,
-                params=params,
-                **query
-            ) as resp:
-                if return_json:
-                    return await Connector.resp_to_json(resp)
-                else:
-                    return resp.status, await resp.text()
-        finally:
-            await self._end_session()
+                return resp.status, await resp.text()
 
     @async_func
     async def getJson(self, path, **query):
@@ -568,18 +868,80 @@ class Connector:
           get_url :
           get :
 
+        Notes
+        -----
+        If the same request is already in flight, no new request is sent,
+        and the result of that request is returned instead. The returned
+        dict is then shared with the other caller, so it should not be
+        modified.
+
         Returns
         -------
         dict
           the response content as a dict
         '''
-        try:
-            session = await self._get_session()
-            async with await self._req(
-                session.get,
-                path,
-                **query
-            ) as resp:
-                return await Connector.resp_to_json(resp)
-        finally:
-            await self._end_session()
+        if not self.coalesce:
+            return await self._getJson(path, **query)
+
+        key = (
+            asyncio.get_running_loop(),
+            path,
+            tuple(sorted((k, str(v)) for k, v in query.items())),
+        )
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._getJson(path, **query))
+            self._in_flight[key] = future
+
+            def done(future):
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+            future.add_done_callback(done)
+        return await asyncio.shield(future)
+
+    async def _getJson(self, path, **query):
+        return await self._get('json', path, **query)
+
+    async def _get(self, kind, path, **query):
+        cache = self.response_cache
+        ttl = cache.ttl_for(path) if cache is not None else 0
+        if ttl:
+            key = (
+                kind, self.userid, path,
+                tuple(sorted((k, str(v)) for k, v in query.items())),
+            )
+            entry, fresh = cache.get(key)
+            if fresh:
+                cache.hits += 1
+                return entry.value
+            cache.misses += 1
+
+        headers = {}
+        if ttl and entry:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        session = await self._get_session()
+        async with self._limit(path), await self._req(
+            session.get,
+            path,
+            params={'headers': headers},
+            **query
+        ) as resp:
+            if resp.status == 304 and ttl and entry:
+                cache.revalidated += 1
+                value = entry.value
+            elif kind == 'json':
+                value = await self.resp_to_json(resp)
+            else:
+                value = resp.status, await resp.text()
+
+            if ttl and resp.status in (200, 304):
+                cache.put(
+                    key, value, ttl,
+                    resp.headers.get('ETag'),
+                    resp.headers.get('Last-Modified'),
+                )
+            return value
@@ -0,0 +1,58 @@
+import json
+
+
+def _stdlib():
+    return json.loads
+
+
+def _orjson():
+    import orjson
+    return orjson.loads
+
+
+def _msgspec():
+    import msgspec
+    return msgspec.json.Decoder().decode
+
+
+# fastest first
+DECODERS = {
+    'orjson':	_orjson,
+    'msgspec':	_msgspec,
+    'json':	_stdlib,
+}
+
+
+def get_decoder(decoder='auto'):
+    '''get a function that decodes json (from bytes or str)
+
+    Parameters
+    ----------
+    decoder : str or callable, optional
+      one of `json` (stdlib), `orjson`, or `msgspec`, or a function
+      that is used as is. `auto` (default) uses the fastest one that
+      is installed.
+
+    Returns
+    -------
+    callable
+      takes bytes (or str), and returns the decoded object
+
+    Raises
+    ------
+    ValueError
+      if the decoder is not known
+    ImportError
+      if the decoder is not installed
+    '''
+    if callable(decoder):
+        return decoder
+    if decoder == 'auto':
+        for make in DECODERS.values():
+            try:
+                return make()
+            except ImportError:
+                pass
+    if decoder not in DECODERS:
+        raise ValueError('unknown json decoder: {}'.format(decoder))
+    return DECODERS[decoder]()
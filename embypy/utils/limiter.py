@@ -0,0 +1,89 @@
+from contextlib import asynccontextmanager
+from fnmatch import fnmatch
+import asyncio
+import time
+
+
+class _Limit:
+    # in-flight limit (semaphore) and/or requests per second (token bucket)
+    def __init__(self, max_requests=None, rate=None, burst=None):
+        self.max_requests	= max_requests
+        self.rate		= rate
+        self.burst		= burst or max(1, rate or 1)
+        self.tokens		= self.burst
+        self.updated		= time.monotonic()
+        self._semaphores	= {}
+
+    async def acquire(self):
+        if self.max_requests:
+            loop = asyncio.get_running_loop()
+            sem = self._semaphores.get(loop)
+            if sem is None:
+                sem = asyncio.Semaphore(self.max_requests)
+                self._semaphores[loop] = sem
+            await sem.acquire()
+        try:
+            while self.rate:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        if self.max_requests:
+            self._semaphores[asyncio.get_running_loop()].release()
+
+
+class Limiter:
+    '''Limits the number and rate of requests sent to emby
+
+    Parameters
+    ----------
+    max_requests : int, optional
+      max number of requests in flight at the same time (default no limit)
+    rate : float, optional
+      max number of requests started per second (default no limit)
+    burst : int, optional
+      number of requests that can be started at once before `rate`
+      kicks in (default `rate`)
+    overrides : dict, optional
+      extra limits for some paths - fnmatch patterns (e.g. `*/Refresh`)
+      to dicts with any of `max_requests`, `rate`, and `burst`.
+      Requests to these paths have to satisfy both limits.
+
+    Notes
+    -----
+    Retries of a request are counted as part of the same request.
+    '''
+    def __init__(self, max_requests=None, rate=None, burst=None,
+                 overrides=None):
+        self.limit = _Limit(max_requests, rate, burst)
+        self.overrides = [
+            (pattern, _Limit(**limits))
+            for pattern, limits in (overrides or {}).items()
+        ]
+
+    @asynccontextmanager
+    async def __call__(self, path):
+        # path specific limits first, so that requests waiting on those
+        # don't hold up a spot of the general limit
+        limits = [lim for p, lim in self.overrides if fnmatch(path, p)]
+        limits.append(self.limit)
+        acquired = []
+        try:
+            for lim in limits:
+                await lim.acquire()
+                acquired.append(lim)
+            yield
+        finally:
+            for lim in reversed(acquired):
+                lim.release()
@@ -0,0 +1,171 @@
+from collections.abc import MutableMapping
+
+# json keys kept for every type
+_BASE = (
+    'Id', 'Name', 'Type', 'MediaType', 'ParentId', 'Path', 'Overview',
+    'PremiereDate', 'DateCreated', 'RunTimeTicks', 'CommunityRating',
+    'Genres', 'Tags', 'ProviderIds', 'UserData', 'IndexNumber', 'ItemId',
+)
+_FOLDER = _BASE + ('ChildCount', 'CumulativeRunTimeTicks', 'PlayedPercentage')
+_VIDEO = _BASE + ('AspectRatio', 'Chapters')
+
+# emby type -> json keys kept for objects of that type
+SCHEMAS = {
+    'Audio': _BASE + (
+        'Album', 'AlbumId', 'AlbumArtist', 'AlbumArtists', 'ArtistItems',
+        'Artists', 'AlbumPrimaryImageTag', 'ParentIndexNumber',
+    ),
+    'Episode': _VIDEO + (
+        'ParentIndexNumber', 'SeasonId', 'SeasonName', 'SeriesId',
+        'SeriesName', 'SeriesGenres',
+    ),
+    'Movie':		_VIDEO,
+    'Video':		_VIDEO,
+    'Trailer':		_VIDEO,
+    'AdultVideo':	_VIDEO,
+    'MusicVideo':	_VIDEO + ('Album', 'Artists'),
+    'Folder':		_FOLDER,
+    'Playlist':		_FOLDER,
+    'BoxSet':		_FOLDER,
+    'MusicAlbum':	_FOLDER + ('AlbumArtists', 'ArtistItems'),
+    'MusicArtist':	_FOLDER,
+    'Season':		_FOLDER + ('SeriesId', 'SeriesName'),
+    'Series':		_FOLDER + ('AirDays', 'AirTime', 'Status'),
+    'GameSystem':	_FOLDER,
+    'Person':		_BASE + ('Role', 'PrimaryImageTag'),
+    'User':		_BASE + (
+        'HasPassword', 'HasConfiguredPassword', 'HasConfiguredEasyPassword',
+        'Configuration', 'Policy',
+    ),
+    'Device':		_BASE + (
+        'AppName', 'AppVersion', 'LastUserName', 'LastUserId',
+        'DateLastActivity', 'IconUrl',
+    ),
+    'Default':		_BASE,
+}
+
+_MISSING = object()
+
+
+class Record(MutableMapping):
+    '''Dict-like record that only stores the keys of its schema
+
+    Records are used as the `object_dict` of emby objects when the
+    connector is created with `records` (see :class:`Records`).
+
+    Keys of the schema are stored in slots, other keys are dropped
+    when the record is created. Keys that are set later (e.g. by
+    property setters) are kept in a regular dict.
+    '''
+    __slots__ = ('_extra',)
+    schema = ()
+    _slots = frozenset()
+
+    # partial records have to be completed before being sent to emby
+    partial = True
+
+    def __init__(self, data):
+        self._extra = None
+        for key in self.schema:
+            value = data.get(key, _MISSING)
+            if value is not _MISSING:
+                object.__setattr__(self, key, value)
+
+    def __getitem__(self, key):
+        if key in self._slots:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        if key in self._slots:
+            return getattr(self, key, default)
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def __setitem__(self, key, value):
+        if key in self._slots:
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._slots:
+            try:
+                object.__delattr__(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        for key in self.schema:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, dict(self))
+
+
+class Records:
+    '''Creates schema-driven records for emby json dicts
+
+    Parameters
+    ----------
+    fields : list, optional
+      extra json keys to keep for every type (e.g. `MediaSources`),
+      on top of the ones used by the object classes
+    schemas : dict, optional
+      emby types to the json keys kept for that type, replaces the
+      default schema of the type (`Default` for unknown types)
+
+    Notes
+    -----
+    Records take a lot less memory than the dicts returned by emby.
+    Since they only have some of the info about an item,
+    `embypy.objects.EmbyObject.send` downloads the full item
+    before sending changes.
+    '''
+    def __init__(self, fields=(), schemas=None):
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        self.fields	= tuple(fields)
+        self.schemas	= {**SCHEMAS, **(schemas or {})}
+        self._types	= {}
+
+    def record_type(self, item_type):
+        '''get the record class used for an emby type'''
+        cls = self._types.get(item_type)
+        if cls is None:
+            schema = self.schemas.get(item_type, self.schemas['Default'])
+            keys = tuple(dict.fromkeys(
+                key for key in schema + self.fields
+                if key.isidentifier() and not hasattr(Record, key)
+            ))
+            cls = type((item_type or 'Default') + 'Record', (Record,), {
+                '__slots__': keys,
+                'schema': keys,
+                '_slots': frozenset(keys),
+            })
+            self._types[item_type] = cls
+        return cls
+
+    def __call__(self, object_dict):
+        '''convert a json dict into a record of its type'''
+        if isinstance(object_dict, Record):
+            return object_dict
+        return self.record_type(object_dict.get('Type'))(object_dict)
@@ -0,0 +1,144 @@
+from email.utils import parsedate_to_datetime
+import aiohttp
+import datetime
+import random
+import time
+
+
+class CircuitOpenError(aiohttp.ClientConnectionError):
+    '''raised instead of sending requests while the server seems down'''
+
+
+class RetryPolicy:
+    '''Decides if (and when) a failed request is sent again
+
+    Parameters
+    ----------
+    tries : int, optional
+      max number of times a request is sent (default 3)
+    base : float, optional
+      shortest wait between tries in seconds (default 0.2)
+    cap : float, optional
+      longest wait between tries in seconds (default 10)
+    max_elapsed : float, optional
+      stop retrying once this many seconds have passed since the first
+      try (default no limit)
+    statuses : tuple, optional
+      http statuses that are retried (default 429, 502, 503, 504)
+    max_delay : float, optional
+      longest wait asked for by the server (`Retry-After`) that is
+      honoured, longer ones are shortened to this (default 60)
+
+    Notes
+    -----
+    Waits grow exponentially with "decorrelated jitter", unless the server
+    sent a `Retry-After` header.
+
+    Requests that are not idempotent (POST) are only retried when they
+    could not have been processed by the server: when no connection
+    could be made, or the status was 429 or 503.
+    '''
+    idempotent_methods = {'get', 'head', 'options', 'put', 'delete'}
+    not_processed_statuses = {429, 503}
+
+    def __init__(self, tries=3, base=0.2, cap=10, max_elapsed=None,
+                 statuses=(429, 502, 503, 504), max_delay=60):
+        self.tries		= tries
+        self.base		= base
+        self.cap		= cap
+        self.max_delay		= max_delay
+        self.max_elapsed	= max_elapsed
+        self.statuses		= set(statuses)
+
+    def is_idempotent(self, method):
+        '''true if `method` (e.g. `get`) can safely be sent twice'''
+        return method.lower() in self.idempotent_methods
+
+    def next_delay(self, previous=None):
+        '''seconds to wait before the next try'''
+        previous = previous or self.base
+        return min(self.cap, random.uniform(self.base, previous * 3))
+
+    def should_retry(self, tries, started, delay):
+        '''true if there is time and tries left for another try'''
+        if tries >= self.tries:
+            return False
+        if self.max_elapsed is None:
+            return True
+        return time.monotonic() - started + delay <= self.max_elapsed
+
+    def retry_after(self, resp):
+        '''seconds the server asked to wait (from `Retry-After`) or None
+
+        at most `max_delay`
+        '''
+        value = resp.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            wait = float(value)
+        except ValueError:
+            try:
+                date = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            now = datetime.datetime.now(datetime.timezone.utc)
+            wait = (date - now).total_seconds()
+        return min(self.max_delay, max(0.0, wait))
+
+
+class CircuitBreaker:
+    '''Fails requests right away while the server seems to be down
+
+    Parameters
+    ----------
+    threshold : int, optional
+      number of failed tries in a row after which requests are no longer
+      sent (default 10)
+    reset_timeout : float, optional
+      seconds to wait before letting a single request through to check
+      if the server is back (default 30)
+
+    Notes
+    -----
+    Not used unless passed to the connection (`circuit_breaker=True`).
+    Responses with status 429 (rate limited) are not failures.
+
+    While open, requests raise :class:`CircuitOpenError`
+    (a subclass of `aiohttp.ClientConnectionError`).
+    '''
+    def __init__(self, threshold=10, reset_timeout=30):
+        self.threshold		= threshold
+        self.reset_timeout	= reset_timeout
+        self.failures		= 0
+        self.opened		= None
+        self.trial		= None
+
+    @property
+    def is_open(self):
+        '''true while requests are not being sent'''
+        return self.opened is not None
+
+    def before(self):
+        '''call before sending a request, raises if it should not be sent'''
+        if self.opened is None:
+            return
+        now = time.monotonic()
+        if now - self.opened < self.reset_timeout:
+            raise CircuitOpenError('Emby server is probably down')
+        if self.trial is not None and now - self.trial < self.reset_timeout:
+            raise CircuitOpenError('Emby server is probably down')
+        self.trial = now
+
+    def success(self):
+        '''call after the server answered'''
+        self.failures	= 0
+        self.opened	= None
+        self.trial	= None
+
+    def failure(self):
+        '''call after the server did not answer (or had an error)'''
+        self.failures += 1
+        if self.trial is not None or self.failures >= self.threshold:
+            self.opened	= time.monotonic()
+            self.trial	= None
@@ -0,0 +1,178 @@
+import datetime
+import json
+import sqlite3
+import threading
+
+
+class Snapshot:
+    '''On-disk store of library listings, so they don't have to be
+    downloaded in full every time a program starts
+
+    Parameters
+    ----------
+    path : str
+      sqlite database file to use (created if needed)
+    max_age : float or dict, optional
+      seconds after which a collection is listed again in full,
+      either one number for all collections or a dict of collection
+      names (e.g. `songs`, `movies`) to numbers, `default` is used for
+      collections that are not in the dict (default one day)
+
+    Notes
+    -----
+    Until a collection is too old, only items that were changed since
+    the last sync are requested. Removed items are only noticed on
+    a full sync (or if removed through `remove`).
+    '''
+    def __init__(self, path, max_age=None):
+        if max_age is None:
+            max_age = {}
+        elif not isinstance(max_age, dict):
+            max_age = {'default': max_age}
+        max_age = {'default': 24 * 60 * 60, **max_age}
+
+        self.path	= path
+        self.max_age	= max_age
+        self._lock	= threading.Lock()
+        self._db	= sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS collections ('
+                ' name TEXT PRIMARY KEY,'
+                ' full_sync REAL,'
+                ' last_sync REAL'
+                ')'
+            )
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS items ('
+                ' collection TEXT,'
+                ' id TEXT,'
+                ' sort_key TEXT,'
+                ' data TEXT,'
+                ' PRIMARY KEY (collection, id)'
+                ')'
+            )
+            # files made before items were sorted are listed again in full
+            columns = [
+                row[1] for row in
+                self._db.execute('PRAGMA table_info(items)').fetchall()
+            ]
+            if 'sort_key' not in columns:
+                self._db.execute('ALTER TABLE items ADD COLUMN sort_key TEXT')
+                self._db.execute('DELETE FROM collections')
+
+    def is_stale(self, collection, now=None):
+        '''true if `collection` needs to be listed again in full'''
+        full_sync, _ = self.sync_times(collection)
+        if full_sync is None:
+            return True
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        max_age = self.max_age.get(collection, self.max_age['default'])
+        return max_age is not None and \
+            (now - full_sync).total_seconds() > max_age
+
+    def sync_times(self, collection):
+        '''times of the last full and last (any) sync of `collection`
+
+        Returns
+        -------
+        tuple
+          two datetimes, or (None, None) if it was never synced
+        '''
+        with self._lock:
+            row = self._db.execute(
+                'SELECT full_sync, last_sync FROM collections WHERE name=?',
+                (collection,)
+            ).fetchone()
+        if not row:
+            return None, None
+        return tuple(
+            datetime.datetime.fromtimestamp(t, datetime.timezone.utc)
+            if t is not None else None
+            for t in row
+        )
+
+    def load(self, collection):
+        '''list of json dicts stored for `collection`
+
+        sorted by name (`SortName` if emby sent it), like listings are
+        '''
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT data FROM items WHERE collection=? '
+                'ORDER BY sort_key COLLATE NOCASE, rowid',
+                (collection,)
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def save(self, collection, items, synced, full=False):
+        '''store json dicts of a collection
+
+        Parameters
+        ----------
+        collection : str
+          name of the collection (e.g. `songs`)
+        items : list
+          json dicts returned by emby
+        synced : datetime.datetime
+          when the items were requested
+        full : bool
+          if true, `items` replace everything stored for `collection`,
+          otherwise they are added to (or replace) the stored items
+        '''
+        rows = [
+            (
+                collection, item['Id'],
+                item.get('SortName') or item.get('Name') or '',
+                json.dumps(item, separators=(',', ':')),
+            )
+            for item in items if item.get('Id')
+        ]
+        synced = synced.timestamp()
+        with self._lock, self._db:
+            if full:
+                self._db.execute(
+                    'DELETE FROM items WHERE collection=?', (collection,)
+                )
+            self._db.executemany(
+                'INSERT INTO items (collection, id, sort_key, data) '
+                'VALUES (?, ?, ?, ?) ON CONFLICT (collection, id) DO UPDATE'
+                ' SET sort_key=excluded.sort_key, data=excluded.data',
+                rows
+            )
+            self._db.execute(
+                'INSERT INTO collections (name, full_sync, last_sync) '
+                'VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE SET '
+                ' full_sync=COALESCE(excluded.full_sync, full_sync),'
+                ' last_sync=excluded.last_sync',
+                (collection, synced if full else None, synced)
+            )
+
+    def remove(self, ids, collection=None):
+        '''remove items by id (from all collections by default)'''
+        query = 'DELETE FROM items WHERE id=?'
+        rows = [(i,) for i in ids]
+        if collection:
+            query += ' AND collection=?'
+            rows = [(i, collection) for i in ids]
+        with self._lock, self._db:
+            self._db.executemany(query, rows)
+
+    def clear(self, collection=None):
+        '''forget everything stored (for `collection` if given)'''
+        with self._lock, self._db:
+            if collection:
+                self._db.execute(
+                    'DELETE FROM items WHERE collection=?', (collection,)
+                )
+                self._db.execute(
+                    'DELETE FROM collections WHERE name=?', (collection,)
+                )
+            else:
+                self._db.execute('DELETE FROM items')
+                self._db.execute('DELETE FROM collections')
+
+    def close(self):
+        '''close the database file'''
+        with self._lock:
+            self._db.close()
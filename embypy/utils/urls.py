@@ -0,0 +1,112 @@
+from urllib.parse import urlencode
+
+
+class UrlBuilder:
+    '''Builds urls for emby requests (without sending anything)
+
+    Parameters
+    ----------
+    url : urllib.parse.ParseResult
+      parsed address of the server
+    urlremote : urllib.parse.ParseResult, optional
+      parsed remote address of the server (used for `remote` urls)
+
+    Notes
+    -----
+    The `scheme://netloc` part of the urls and the api key part of the
+    query are only computed once, so building a url is mostly string
+    concatenation.
+
+    Paths can contain `{UserId}`, `{ApiKey}`, and `{DeviceId}` fields.
+    For `build_many`, `{Id}` is replaced by each of the ids.
+    '''
+    def __init__(self, url, urlremote=None):
+        self._bases = {}
+        for remote in (False, True):
+            parsed = (urlremote or url) if remote else url
+            for websocket in (False, True):
+                scheme = parsed.scheme
+                if websocket:
+                    scheme = scheme.replace('http', 'ws')
+                self._bases[websocket, remote] = '{}://{}'.format(
+                    scheme, parsed.netloc
+                ) if scheme else '//' + parsed.netloc
+        self._auth_key	= None
+        self._auth	= ''
+
+    def base(self, websocket=False, remote=True):
+        '''`scheme://netloc` part of the urls'''
+        return self._bases[websocket, remote]
+
+    def auth_query(self, api_key, device_id):
+        '''encoded `api_key`/`deviceId` query (empty without an api key)'''
+        if (api_key, device_id) != self._auth_key:
+            self._auth_key = (api_key, device_id)
+            self._auth = urlencode(
+                {'api_key': api_key, 'deviceId': device_id}
+            ) if api_key else ''
+        return self._auth
+
+    def build(self, path='/', query=None, websocket=False, remote=True,
+              auth='', user_id=None, pass_uid=False, **fields):
+        '''construct a url
+
+        Parameters
+        ----------
+        path : str
+          uri path, can contain `{UserId}` (etc.) fields
+        query : dict, optional
+          parameters to set (part of url after the `?`), not modified
+        websocket : bool, optional
+          if true, then `ws(s)` are used instead of `http(s)`
+        remote : bool, optional
+          if true, remote-address is used (default True)
+        auth : str, optional
+          encoded query added after `query` (see `auth_query`)
+        user_id : str, optional
+          used for `{UserId}`, and for the query if `pass_uid` is true
+        pass_uid : bool, optional
+          if true, `userId` is added to the query
+        fields : karg dict
+          values for other fields in `path` (`ApiKey`, `DeviceId`, ...)
+
+        Returns
+        -------
+        str
+          full url
+        '''
+        if '{' in path:
+            path = path.format(UserId=user_id, **fields)
+        if path and path[0] != '/':
+            path = '/' + path
+
+        url = self._bases[websocket, remote] + path
+        params = urlencode(query) if query else ''
+        if auth:
+            params = params + '&' + auth if params else auth
+        if pass_uid:
+            uid = urlencode({'userId': user_id})
+            params = params + '&' + uid if params else uid
+        return url + '?' + params if params else url
+
+    def build_many(self, path, ids, **options):
+        '''construct a url for each id
+
+        Parameters
+        ----------
+        path : str
+          uri path with an `{Id}` field (e.g. `/Items/{Id}/Images/Primary`)
+        ids : list
+          ids to use for `{Id}`
+        options : karg dict
+          same as for `build`
+
+        Returns
+        -------
+        list
+          one url per id (in the same order)
+        '''
+        marker = '\x00'
+        url = self.build(path, Id=marker, **options)
+        prefix, _, suffix = url.partition(marker)
+        return [prefix + str(i) + suffix for i in ids]
@@ -30,6 +30,9 @@ setup(
       'embypy.objects': embypy_objs
     },
     install_requires=requirements,
+    extras_require={
+      'fast': ['orjson'],
+    },
     packages=['embypy', 'embypy.objects', 'embypy.utils'],
     classifiers=[
       'Development Status :: 4 - Beta',